@@ -0,0 +1,159 @@
+# FractalAnalyzer performance benchmark
+#
+# Times preprocess_frame, box_count, differential_box_count, fourier_slope and
+# moisy_boxcount on synthetic frames at 480p, 1080p, 4K and 8K, reporting
+# throughput (frames/s) and peak memory.  Results can be saved as a JSON
+# baseline and later runs compared against it, failing when any case got
+# more than --tolerance percent slower (e.g. after upgrading OpenCV/NumPy).
+#
+#   python benchmark_core.py --save-baseline benchmark_baseline.json
+#   python benchmark_core.py --baseline benchmark_baseline.json --tolerance 15
+#   python benchmark_core.py --resolutions 480p 1080p --methods box_count
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.core import ENGINES, FractalAnalyzer
+
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '1080p': (1920, 1080),
+    '4K': (3840, 2160),
+    '8K': (7680, 4320),
+}
+
+METHODS = ('preprocess_frame', 'box_count', 'differential_box_count',
+           'fourier_slope', 'moisy_boxcount')
+
+
+def synthetic_frame(width, height, seed=0):
+    """Deterministic BGR frame: posterized multi-octave noise plus fine grain.
+
+    The band boundaries are fractal contours, so edge detection and box
+    counting see realistic amounts of structure at every resolution.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.zeros((height, width), dtype=np.float32)
+    size = 4
+    amplitude = 1.0
+    while size < max(width, height):
+        octave = rng.random((max(2, size * height // width), size), dtype=np.float32)
+        image += amplitude * cv2.resize(octave, (width, height), interpolation=cv2.INTER_CUBIC)
+        size *= 2
+        amplitude *= 0.5
+    image = cv2.normalize(image, None, 0, 4.99, cv2.NORM_MINMAX)
+    image = np.floor(image) * 56 + rng.integers(0, 16, size=image.shape, dtype=np.uint8)
+    gray = image.astype(np.uint8)
+    tint = np.array([0.8, 1.0, 0.9], dtype=np.float32)
+    return (gray[..., None] * tint).astype(np.uint8)
+
+
+def make_case(analyzer, method, frame):
+    """Return a zero-argument callable running *method* once on inputs derived from *frame*."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if method == 'preprocess_frame':
+        return lambda: analyzer.preprocess_frame(frame)
+    if method == 'box_count':
+        edges = analyzer.preprocess_frame(frame)
+        return lambda: analyzer.box_count(edges)
+    if method == 'differential_box_count':
+        return lambda: analyzer.differential_box_count(gray)
+    if method == 'fourier_slope':
+        return lambda: analyzer.fourier_slope(gray)
+    if method == 'moisy_boxcount':
+        bw = gray > int(0.25 * 255)
+        return lambda: analyzer.moisy_boxcount(bw)
+    raise ValueError(f"Unknown method {method!r}")
+
+
+def run_case(fn, min_time, max_runs):
+    """Time *fn* after one warm-up call; returns (runs, median seconds, peak MB)."""
+    fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_runs and (time.perf_counter() - start < min_time or len(times) < 3):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+
+    # Peak memory of one more call, measured separately (tracing slows it down).
+    # tracemalloc sees NumPy arrays, including OpenCV outputs, but not
+    # OpenCV's internal temporaries.
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(times), float(np.median(times)), peak / 2**20
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FractalAnalyzer methods on synthetic frames.")
+    parser.add_argument('--resolutions', nargs='+', default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=list(METHODS))
+    parser.add_argument('--engine', default='pyramid', choices=ENGINES)
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds to time each case for (default 1)")
+    parser.add_argument('--max-runs', type=int, default=50, help="maximum timed calls per case")
+    parser.add_argument('--save-baseline', metavar='JSON', help="write the results to this baseline file")
+    parser.add_argument('--baseline', metavar='JSON', help="compare against this baseline file")
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help="percent slowdown vs. the baseline that fails the run (default 10)")
+    args = parser.parse_args()
+
+    analyzer = FractalAnalyzer(engine=args.engine)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    failures = []
+    print(f"engine={args.engine}  numpy {np.__version__}  opencv {cv2.__version__}")
+    print(f"{'case':<36}{'fps':>9}{'ms':>10}{'peak MB':>9}{'vs base':>9}")
+    for res in args.resolutions:
+        frame = synthetic_frame(*RESOLUTIONS[res])
+        for method in args.methods:
+            key = f"{method}@{res}"
+            runs, seconds, peak_mb = run_case(make_case(analyzer, method, frame), args.min_time, args.max_runs)
+            results[key] = {'fps': 1.0 / seconds, 'ms': seconds * 1000, 'peak_mb': peak_mb, 'runs': runs}
+
+            change = ''
+            if baseline and key in baseline:
+                slower = 100.0 * (seconds * 1000 / baseline[key]['ms'] - 1.0)
+                change = f"{slower:+.0f}%"
+                if slower > args.tolerance:
+                    failures.append(f"{key} is {slower:.0f}% slower than the baseline "
+                                    f"({seconds * 1000:.1f} ms vs {baseline[key]['ms']:.1f} ms)")
+            print(f"{key:<36}{1.0 / seconds:>9.2f}{seconds * 1000:>10.1f}{peak_mb:>9.0f}{change:>9}")
+        del frame
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'environment': environment(), 'engine': args.engine, 'results': results}, f, indent=4)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# Import-time benchmark
+#
+# Imports each module in a fresh interpreter and reports the best wall time
+# over several runs, and which heavy optional modules it pulled in.  The
+# analysis core must stay free of GUI/plotting modules and must not import
+# scipy (no longer used), pandas or cupy until they are actually used.
+#
+#   python benchmark_imports.py               # table
+#   python benchmark_imports.py --max-ms 500  # also fail if the core is slower
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules that only the GUI (or a first use) may load
+HEAVY = ('PyQt5', 'matplotlib', 'pandas', 'scipy', 'cupy', 'pyarrow')
+
+# module -> heavy modules it is allowed to import
+TARGETS = {
+    'src.core': (),
+    'src.pipeline': (),
+    'src.parallel': (),
+    'src.utils': (),
+    'src.writer': (),
+    'src.batch': (),
+    'src.workers': ('PyQt5',),
+    'src.gui': ('PyQt5', 'matplotlib'),
+}
+
+# Modules whose import time --max-ms applies to
+CORE = ('src.core', 'src.pipeline')
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{'ms': elapsed * 1000,
+                  'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeats):
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    best = None
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+                             cwd=root, env=env, capture_output=True, text=True, check=True)
+        run = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or run['ms'] < best['ms']:
+            best = run
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the analyzer modules.")
+    parser.add_argument('--repeats', type=int, default=5, help="runs per module (best is reported)")
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help=f"fail if {' or '.join(CORE)} takes longer to import")
+    parser.add_argument('--json', default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    print(f"{'module':<16}{'ms':>8}  heavy modules loaded")
+    for module, allowed in TARGETS.items():
+        run = measure(module, args.repeats)
+        results[module] = run
+        print(f"{module:<16}{run['ms']:>8.0f}  {', '.join(run['loaded']) or '-'}")
+        unexpected = [m for m in run['loaded'] if m not in allowed]
+        if unexpected:
+            failures.append(f"{module} imports {', '.join(unexpected)}")
+        if args.max_ms is not None and module in CORE and run['ms'] > args.max_ms:
+            failures.append(f"{module} took {run['ms']:.0f} ms (limit {args.max_ms:.0f} ms)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.pipeline import analyze_video
+
+
+@pytest.fixture(scope='session')
+def clip(tmp_path_factory):
+    """Path of a short synthetic video: 90 frames of moving blobs over noise at 30 fps."""
+    path = str(tmp_path_factory.mktemp('clip') / 'clip.avi')
+    rng = np.random.default_rng(7)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (160, 120))
+    for i in range(90):
+        frame = (rng.random((120, 160, 3)) * 60).astype(np.uint8)
+        for k in range(4):
+            center = (int(20 + 35 * k + i) % 160, int(30 + 20 * k + 0.5 * i) % 120)
+            cv2.circle(frame, center, 10 + 3 * k, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def analyze():
+    """Run ``analyze_video`` and return its results without preview images."""
+    def run(video_path, settings):
+        results = []
+
+        def collect(result):
+            for key in ('frame', 'edges', 'df'):
+                result.pop(key, None)
+            results.append(result)
+
+        assert analyze_video(video_path, settings, on_result=collect)
+        return results
+    return run
+
+
+@pytest.fixture
+def assert_same_results():
+    """Check that two result lists hold the same frames, in order, with identical values."""
+    def check(results, expected):
+        assert [r['frame_idx'] for r in results] == [r['frame_idx'] for r in expected]
+        for result, ref in zip(results, expected):
+            assert set(result) == set(ref)
+            for key, value in ref.items():
+                np.testing.assert_array_equal(result[key], value,
+                                              err_msg=f"{key} of frame {ref['frame_idx']}")
+    return check
@@ -0,0 +1,317 @@
+# Golden-output equivalence harness
+#
+# A fixed corpus of frames (golden/corpus.npz) with reference outputs
+# (golden/references.json).  The committed references were computed on the
+# CPU by src/core.py of the repository's "baseline" commit, before any of
+# the engine, pyramid or line-fit optimizations (scipy.stats.linregress), so
+# the current code is checked against the original implementation rather
+# than against itself.  The runner recomputes every method with every
+# available engine and backend (pyramid/reference, CPU/GPU, batched and
+# multi-threshold paths) and compares against the references with
+# per-method tolerances.  Any faster engine must pass before it ships.
+#
+#   python golden_outputs.py                      # compare, exit 1 on mismatch
+#   python golden_outputs.py --update --baseline <rev>   # recompute references with
+#                                                 # src/core.py of git revision <rev>
+#   python golden_outputs.py --update             # ... or with the current 'reference' engine
+#   python golden_outputs.py --rebuild-corpus     # regenerate the synthetic frames too
+#   python golden_outputs.py --add-video clip.mp4 --frames 4   # add recorded frames
+#
+# Moisy counts and D must match exactly (up to floating-point rounding);
+# the regression methods must match to floating-point noise.
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import types
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from src.core import ENGINES, FractalAnalyzer, gpu_available
+
+GOLDEN_DIR = os.path.join(ROOT, 'golden')
+CORPUS_PATH = os.path.join(GOLDEN_DIR, 'corpus.npz')
+REFERENCES_PATH = os.path.join(GOLDEN_DIR, 'references.json')
+
+METHODS = ('box_count', 'moisy_boxcount', 'differential_box_count', 'fourier_slope')
+
+# Per-method absolute tolerances for the scalar outputs and the log-log arrays
+TOLERANCES = {
+    'box_count': {'D': 1e-9, 'R2': 1e-9, 'arrays': 1e-12},
+    # Box counts are exact and the fit of identical counts is deterministic
+    'moisy_boxcount': {'D': 1e-9, 'D_std': 1e-9, 'arrays': 0.0},
+    'differential_box_count': {'D': 1e-9, 'R2': 1e-9, 'arrays': 1e-12},
+    'fourier_slope': {'D': 1e-7, 'R2': 1e-7, 'arrays': 1e-9},  # FFT rounding differs by backend
+}
+
+# Same preprocessing as the GUI defaults
+EDGE_SETTINGS = dict(method='canny', threshold_mode='auto', blur_kernel=(5, 5))
+MOISY_THRESHOLD = 0.25
+MOISY_SCALE_RANGE = (4, 8)
+
+
+# ----------------------------------------------------------------------
+# Corpus
+# ----------------------------------------------------------------------
+
+def synthetic_corpus():
+    """Deterministic synthetic frames covering fractals, flat shapes, noise and edge cases."""
+    from benchmark_core import synthetic_frame
+
+    analyzer = FractalAnalyzer()
+    rng = np.random.default_rng(2024)
+    frames = {
+        'sierpinski_512': analyzer.generate_sierpinski_triangle(size=512, n_points=200_000),
+        'square_filled_512': analyzer.generate_square(512, filled=True),
+        'square_outline_512': analyzer.generate_square(512, filled=False),
+        'octave_noise_480x270': synthetic_frame(480, 270, seed=1),
+        'octave_noise_640x360_gray': cv2.cvtColor(synthetic_frame(640, 360, seed=2), cv2.COLOR_BGR2GRAY),
+        'uniform_noise_257x193': rng.integers(0, 256, size=(193, 257), dtype=np.uint8),
+        'gradient_300x200': np.tile(np.linspace(0, 255, 300).astype(np.uint8), (200, 1)),
+        'black_320x240': np.zeros((240, 320), dtype=np.uint8),
+        'single_pixel_64': np.pad(np.array([[255]], dtype=np.uint8), ((40, 23), (17, 46))),
+    }
+    # Frames that went through a video codec (blocking, chroma subsampling)
+    for name, frame in encoded_frames(synthetic_frame(480, 270, seed=3)).items():
+        frames[name] = frame
+    return frames
+
+
+def encoded_frames(frame, count=2):
+    """Round-trip *frame* (slightly shifted each time) through an MJPG video file."""
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'golden.avi')
+    h, w = frame.shape[:2]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (w, h))
+    for i in range(count):
+        out.write(np.roll(frame, 7 * i, axis=1))
+    out.release()
+    cap = cv2.VideoCapture(path)
+    frames = {}
+    for i in range(count):
+        ret, decoded = cap.read()
+        if not ret:
+            break
+        frames[f'encoded_{w}x{h}_{i}'] = decoded
+    cap.release()
+    os.remove(path)
+    return frames
+
+
+def recorded_frames(video_path, count):
+    """*count* frames spread evenly over a video file."""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    frames = {}
+    for idx in np.linspace(0, max(total - 1, 0), count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames[f'recorded_{base}_{idx}'] = frame
+    cap.release()
+    return frames
+
+
+def load_corpus():
+    with np.load(CORPUS_PATH) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def save_corpus(frames):
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    np.savez_compressed(CORPUS_PATH, **frames)
+
+
+# ----------------------------------------------------------------------
+# Running the methods
+# ----------------------------------------------------------------------
+
+def _gray(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+def _arrays(scales, counts):
+    return np.asarray(scales, dtype=float), np.asarray(counts, dtype=float)
+
+
+def run_method(analyzer, method, frame, variant='frame'):
+    """Outputs of *method* on *frame* as a dict of floats and float arrays.
+
+    *variant* selects the code path: 'frame' is the per-frame method,
+    'batch' ``box_count_batch`` on a one-frame stack and 'thresholds'
+    ``analyze_frame_moisy_thresholds`` with the single default threshold.
+    """
+    if method == 'box_count':
+        edges = analyzer.preprocess_frame(frame, **EDGE_SETTINGS)
+        if variant == 'batch':
+            D, R2, scales, counts, _ = analyzer.box_count_batch(edges[None])
+            counts = counts[0]
+            if np.isnan(counts).all():
+                scales, counts = [], []  # no edges, as box_count reports it
+            D, R2 = D[0], R2[0]
+        else:
+            D, R2, scales, counts, _ = analyzer.box_count(edges)
+        scales, counts = _arrays(scales, counts)
+        return {'D': D, 'R2': R2, 'log_scales': scales, 'log_counts': counts,
+                'edge_pixels': int(np.count_nonzero(edges))}
+
+    if method == 'moisy_boxcount':
+        if variant == 'thresholds':
+            D, D_std, _, _, _ = analyzer.analyze_frame_moisy_thresholds(
+                frame, [MOISY_THRESHOLD], MOISY_SCALE_RANGE)
+            return {'D': D[0], 'D_std': D_std[0]}
+        D, D_std, n, r, _, _ = analyzer.analyze_frame_moisy(frame, MOISY_THRESHOLD, MOISY_SCALE_RANGE)
+        with np.errstate(divide='ignore'):  # log(0) = -inf for frames without foreground
+            scales, counts = np.log(np.asarray(r, dtype=float)), np.log(np.asarray(n, dtype=float))
+        return {'D': D, 'D_std': D_std, 'log_scales': scales, 'log_counts': counts}
+
+    if method == 'differential_box_count':
+        D, R2, scales, counts = analyzer.differential_box_count(_gray(frame))
+    else:
+        D, R2, scales, counts = analyzer.fourier_slope(_gray(frame))
+    scales, counts = _arrays(scales, counts)
+    return {'D': D, 'R2': R2, 'log_scales': scales, 'log_counts': counts}
+
+
+def backends():
+    """(name, analyzer, variants per method) for every engine/backend available here."""
+    variants = {
+        'box_count': ('frame', 'batch'),
+        'moisy_boxcount': ('frame', 'thresholds'),
+        'differential_box_count': ('frame',),
+        'fourier_slope': ('frame',),
+    }
+    devices = [False, True] if gpu_available() else [False]
+    for engine in ENGINES:
+        for use_gpu in devices:
+            analyzer = FractalAnalyzer(engine=engine)
+            analyzer.use_gpu = use_gpu
+            yield f"{engine}/{'gpu' if use_gpu else 'cpu'}", analyzer, variants
+
+
+def reference_analyzer():
+    analyzer = FractalAnalyzer(engine='reference')
+    analyzer.use_gpu = False
+    return analyzer
+
+
+def baseline_analyzer(rev):
+    """CPU FractalAnalyzer of ``src/core.py`` as of git revision *rev*."""
+    source = subprocess.run(['git', 'show', f'{rev}:src/core.py'], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    module = types.ModuleType(f'core_{rev}')
+    exec(compile(source, f'{rev}:src/core.py', 'exec'), module.__dict__)
+    analyzer = module.FractalAnalyzer()
+    analyzer.use_gpu = False
+    return analyzer
+
+
+def _to_json(outputs):
+    return {k: (v.tolist() if isinstance(v, np.ndarray) else float(v) if not isinstance(v, int) else v)
+            for k, v in outputs.items()}
+
+
+def compute_references(corpus, analyzer=None):
+    analyzer = analyzer or reference_analyzer()
+    return {name: {method: _to_json(run_method(analyzer, method, frame)) for method in METHODS}
+            for name, frame in corpus.items()}
+
+
+# ----------------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------------
+
+def compare(method, outputs, reference):
+    """List of mismatch descriptions (empty if within the method's tolerances)."""
+    tol = TOLERANCES[method]
+    problems = []
+    if 'edge_pixels' in outputs and outputs['edge_pixels'] != reference['edge_pixels']:
+        # Different edge image: the preprocessing (OpenCV) changed, not the engine
+        return [f"edge image changed ({outputs['edge_pixels']} vs {reference['edge_pixels']} pixels)"]
+    for key, value in outputs.items():
+        if key == 'edge_pixels' or key not in reference:
+            continue
+        ref = reference[key]
+        if isinstance(value, np.ndarray):
+            ref = np.asarray(ref, dtype=float)
+            if value.shape != ref.shape:
+                problems.append(f"{key} has {value.size} points, reference {ref.size}")
+            elif not np.allclose(value, ref, rtol=0.0, atol=tol['arrays'], equal_nan=True):
+                problems.append(f"{key} differs by {np.nanmax(np.abs(value - ref)):.3g}")
+        else:
+            value = float(value)
+            same = (math.isnan(value) and math.isnan(ref)) or abs(value - ref) <= tol[key]
+            if not same:
+                problems.append(f"{key} = {value:.12g}, reference {ref:.12g}")
+    return problems
+
+
+def run_checks(corpus, references, verbose=False):
+    failures = 0
+    checked = 0
+    for backend, analyzer, variants in backends():
+        for method in METHODS:
+            for variant in variants[method]:
+                label = f"{backend:<14}{method:<24}{variant:<12}"
+                bad = []
+                for name, frame in corpus.items():
+                    if name not in references:
+                        continue
+                    problems = compare(method, run_method(analyzer, method, frame, variant),
+                                       references[name][method])
+                    checked += 1
+                    if problems:
+                        bad.append((name, problems))
+                print(f"{label}{'FAIL' if bad else 'ok'}")
+                for name, problems in bad:
+                    failures += 1
+                    for problem in problems if verbose else problems[:1]:
+                        print(f"    {name}: {problem}")
+    return checked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare every engine/backend against the golden reference outputs.")
+    parser.add_argument('--update', action='store_true',
+                        help="recompute the references with the reference engine")
+    parser.add_argument('--rebuild-corpus', action='store_true',
+                        help="regenerate the synthetic frames (keeps recorded frames); implies --update")
+    parser.add_argument('--add-video', metavar='VIDEO', help="add frames of a recorded video to the corpus; implies --update")
+    parser.add_argument('--baseline', metavar='REV',
+                        help="with --update, compute the references with src/core.py of git revision REV "
+                             "(e.g. the pre-optimization baseline) instead of the reference engine")
+    parser.add_argument('--frames', type=int, default=4, help="frames to take from --add-video (default 4)")
+    parser.add_argument('--verbose', action='store_true', help="print every mismatch of a failing frame")
+    args = parser.parse_args()
+
+    corpus = load_corpus() if os.path.exists(CORPUS_PATH) else {}
+    if args.rebuild_corpus or not corpus:
+        recorded = {k: v for k, v in corpus.items() if k.startswith('recorded_')}
+        corpus = {**synthetic_corpus(), **recorded}
+    if args.add_video:
+        corpus.update(recorded_frames(args.add_video, args.frames))
+
+    if args.update or args.rebuild_corpus or args.add_video or not os.path.exists(REFERENCES_PATH):
+        save_corpus(corpus)
+        analyzer = baseline_analyzer(args.baseline) if args.baseline else None
+        references = compute_references(corpus, analyzer)
+        with open(REFERENCES_PATH, 'w') as f:
+            json.dump(references, f, indent=1)
+        print(f"Saved {len(corpus)} frames and their reference outputs to {GOLDEN_DIR}")
+    else:
+        with open(REFERENCES_PATH) as f:
+            references = json.load(f)
+
+    checked, failures = run_checks(corpus, references, args.verbose)
+    print(f"{checked} comparisons, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Headless batch runner: analyze many videos in parallel without a GUI.
+
+Usage::
+
+    python -m src.batch videos/*.mp4 --workers 8 --analysis-type dbc
+    python -m src.batch footage/ --settings settings.json --output-dir results/
+    python -m src.batch footage/ --result-cache   # rerun after a crash: resumes
+
+Each video is analyzed in its own worker process and produces the same CSV,
+JSON summary and PNG plots as batch mode in the GUI.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Same defaults as the GUI's settings panel
+DEFAULT_SETTINGS = {
+    'sampling_rate': 1,
+    'edge_method': 'canny',
+    'threshold_mode': 'auto',
+    'blur_kernel_size': 5,
+    'analysis_type': 'moisy_boxcount',
+    'moisy_threshold': 0.25,
+    'scale_range': (4, 8),
+    'r2_threshold': 0.90,
+    'clip_start_sec': 0,
+    'clip_end_sec': 0,
+    'frame_workers': 1,
+    'segments': 1,
+}
+
+
+def expand_inputs(inputs):
+    """Expand files, folders and glob patterns into a sorted list of videos."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [os.path.join(item, f) for f in os.listdir(item)]
+        else:
+            matches = glob.glob(item) or [item]
+        for path in matches:
+            if path.lower().endswith(VIDEO_EXTENSIONS) and path not in files:
+                files.append(path)
+    return sorted(files)
+
+
+def _init_worker():
+    # One video per process: keep OpenCV from spawning its own thread pool
+    # in every worker and oversubscribing the cores.
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def process_video(video_path, settings, output_dir=None, profile=False):
+    """Analyze one video and write its CSV, binary results, JSON summary and PNG plots.
+
+    Results are streamed to the CSV and a binary columnar directory while
+    the video is analyzed, so memory use does not grow with video length;
+    the summary comes from running aggregates.
+
+    With *profile*, per-stage timings are written to a JSON report too
+    (see ``src.profiling``).
+
+    Returns ``(video_path, summary)``; *summary* is None if the video could
+    not be opened or produced no results.
+    """
+    from src import profiling
+    from src.pipeline import analyze_video
+    from src.utils import (batch_output_paths, save_loglog_plot, save_results_binary,
+                           save_summary_json, save_timeseries_plot)
+    from src.writer import StreamingResultWriter, read_result_columns
+
+    paths = batch_output_paths(video_path, output_dir)
+    writer = StreamingResultWriter(paths['csv'], paths['columns'])
+    last = {}
+
+    def collect(result):
+        # Store only numeric data (not images), as the GUI does
+        result.pop('frame', None)
+        result.pop('edges', None)
+        result.pop('df', None)
+        writer.append(result)
+        last['result'] = result
+
+    profiler = profiling.enable() if profile else None
+    try:
+        opened = analyze_video(video_path, settings, on_result=collect)
+    finally:
+        writer.close()
+        if profiler is not None:
+            profiling.disable()
+            save_summary_json(profiler.report(), paths['profile'])
+    if not opened:
+        print(f"Error: Could not open video {video_path}")
+        return video_path, None
+    if not last:
+        return video_path, None
+
+    # The binary export and the D(t) plot read the columns back from disk
+    columns = read_result_columns(paths['columns'])
+    save_results_binary(columns, paths['binary'])
+    save_timeseries_plot({'timestamp': columns['timestamp'], 'D': columns['D']},
+                         paths['timeseries'])
+    save_loglog_plot(last['result'], paths['loglog'])
+    summary = writer.summary(video_path)
+    save_summary_json(summary, paths['json'])
+    return video_path, summary
+
+
+def run_batch(video_paths, settings, workers=None, output_dir=None, profile=False):
+    """Analyze *video_paths* with up to *workers* videos in flight at once.
+
+    Returns a dict mapping each video path to its summary (or None on failure).
+    """
+    workers = workers or os.cpu_count() or 1
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(video_paths)),
+                             initializer=_init_worker) as pool:
+        futures = {pool.submit(process_video, path, settings, output_dir, profile): path
+                   for path in video_paths}
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                _, summary = future.result()
+            except Exception as e:
+                print(f"Error analyzing {path}: {e}")
+                summary = None
+            summaries[path] = summary
+            status = f"mean D = {summary['mean_D']:.4f}" if summary else "failed"
+            print(f"[{done}/{len(video_paths)}] {os.path.basename(path)}: {status}")
+    return summaries
+
+
+def build_settings(args):
+    """Merge defaults, an optional settings JSON and command-line overrides."""
+    settings = dict(DEFAULT_SETTINGS)
+    if args.settings:
+        if os.path.isfile(args.settings):
+            with open(args.settings) as f:
+                settings.update(json.load(f))
+        else:
+            settings.update(json.loads(args.settings))
+
+    overrides = {
+        'sampling_rate': args.sampling_rate,
+        'analysis_type': args.analysis_type,
+        'analysis_types': args.analysis_types,
+        'edge_method': args.edge_method,
+        'threshold_mode': args.threshold_mode,
+        'blur_kernel_size': args.blur_kernel_size,
+        'moisy_threshold': args.moisy_threshold,
+        'scale_range': tuple(args.scale_range) if args.scale_range else None,
+        'r2_threshold': args.r2_threshold,
+        'clip_start_sec': args.clip_start,
+        'clip_end_sec': args.clip_end,
+        'frame_workers': args.frame_workers,
+        'segments': args.segments,
+        'batch_size': args.batch_size,
+        'engine': args.engine,
+        'frame_cache': True if args.frame_cache else None,
+        'cache_dir': args.cache_dir,
+        'frame_cache_max_width': args.frame_cache_max_width,
+        'frame_cache_max_mb': args.frame_cache_max_mb,
+        'result_cache': True if args.result_cache else None,
+        'result_cache_max_mb': args.result_cache_max_mb,
+        'skip_mode': args.skip_mode,
+    }
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    settings['scale_range'] = tuple(settings['scale_range'])
+    if settings.get('analysis_types'):
+        settings['analysis_type'] = settings['analysis_types'][0]
+    return settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.batch',
+        description="Batch fractal dimension analysis of videos (no GUI).")
+    parser.add_argument('inputs', nargs='+',
+                        help="Video files, folders or glob patterns")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="Videos analyzed in parallel (default: CPU count)")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="Write outputs here instead of next to each video")
+    parser.add_argument('--settings', default=None,
+                        help="Settings dict as a JSON file or JSON string")
+    parser.add_argument('--analysis-type',
+                        choices=['moisy_boxcount', 'box_counting', 'dbc', 'fourier'])
+    parser.add_argument('--analysis-types', nargs='+',
+                        choices=['moisy_boxcount', 'box_counting', 'dbc', 'fourier'],
+                        help="Run several methods in one pass (decode once, "
+                             "method-prefixed columns); the first one drives the plots")
+    parser.add_argument('--sampling-rate', type=int)
+    parser.add_argument('--edge-method', choices=['canny', 'sobel'])
+    parser.add_argument('--threshold-mode', choices=['auto', 'manual'])
+    parser.add_argument('--blur-kernel-size', type=int)
+    parser.add_argument('--moisy-threshold', type=float)
+    parser.add_argument('--scale-range', type=int, nargs=2, metavar=('START', 'END'))
+    parser.add_argument('--r2-threshold', type=float,
+                        help="Minimum R² for a reliable Edge + Box Counting fit")
+    parser.add_argument('--clip-start', type=float, help="Clip start in seconds")
+    parser.add_argument('--clip-end', type=float, help="Clip end in seconds (0 = end of video)")
+    parser.add_argument('--frame-workers', type=int,
+                        help="Processes analyzing frames of each video in parallel")
+    parser.add_argument('--segments', type=int,
+                        help="Split each video into this many independently decoded segments")
+    parser.add_argument('--batch-size', type=int,
+                        help="Box-count this many sampled frames per vectorized pass "
+                             "(Edge + Box Counting only)")
+    parser.add_argument('--engine', choices=['pyramid', 'reference'],
+                        help="Box-counting engine (default: pyramid)")
+    parser.add_argument('--frame-cache', action='store_true',
+                        help="Cache decoded grayscale frames on disk so repeat runs skip decoding")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Cache folder (default: ~/.cache/visual-complexity-analyzer)")
+    parser.add_argument('--frame-cache-max-width', type=int,
+                        help="Downscale cached frames to at most this width")
+    parser.add_argument('--frame-cache-max-mb', type=float,
+                        help="Frame cache size before least-recently-used videos are evicted "
+                             "(default: 8192)")
+    parser.add_argument('--result-cache', action='store_true',
+                        help="Save per-frame results on disk; reruns skip finished frames "
+                             "and interrupted runs resume")
+    parser.add_argument('--result-cache-max-mb', type=float,
+                        help="Result cache size before least-recently-used jobs are evicted "
+                             "(default: 1024)")
+    parser.add_argument('--skip-mode', choices=['auto', 'grab', 'seek'],
+                        help="How frames between samples are skipped: grab() them, seek past "
+                             "them, or pick the cheaper from measured costs (default: auto)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write per-stage timings (decode, blur, counting, fitting...) "
+                             "next to each video's outputs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    video_paths = expand_inputs(args.inputs)
+    if not video_paths:
+        print("No video files found.")
+        return 1
+
+    settings = build_settings(args)
+    print(f"Analyzing {len(video_paths)} videos with settings: {settings}")
+    t0 = time.perf_counter()
+    summaries = run_batch(video_paths, settings, args.workers, args.output_dir, args.profile)
+    failed = [p for p, s in summaries.items() if s is None]
+    print(f"Done in {time.perf_counter() - t0:.1f}s "
+          f"({len(summaries) - len(failed)} succeeded, {len(failed)} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,396 @@
+"""On-disk caches that let repeat analyses of the same video skip work."""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+import cv2
+import numpy as np
+
+from src.seeking import FrameSkipper
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache',
+                                 'visual-complexity-analyzer')
+
+
+# Default size budgets before least-recently-used videos / jobs are evicted
+DEFAULT_FRAME_CACHE_MB = 8192
+DEFAULT_RESULT_CACHE_MB = 1024
+
+# Frames per chunk file of the frame cache
+_CHUNK_FRAMES = 16
+
+# Settings that change how a job runs, not the per-frame results
+_RUNTIME_SETTINGS = ('sampling_rate', 'clip_start_sec', 'clip_end_sec', 'frame_workers',
+                     'segments', 'batch_size', 'engine', 'frame_cache', 'cache_dir',
+                     'result_cache', 'result_cache_max_mb', 'frame_cache_max_mb', 'preview_size',
+                     'preview_max_fps', 'skip_mode')
+
+
+def _video_stamp(video_path):
+    """(absolute path, mtime in ns, size) identifying one version of a video file."""
+    st = os.stat(video_path)
+    return os.path.abspath(video_path), st.st_mtime_ns, st.st_size
+
+
+def _evict_frame_caches(cache_dir, max_bytes, keep):
+    """Delete least-recently-used videos' cached frames (never *keep*) until under *max_bytes*.
+
+    Returns the bytes still in use.  Recency is the mtime of each video's
+    ``.json`` file, which :class:`FrameCache` touches whenever it is opened.
+    """
+    names, sizes, last_used = {}, {}, {}
+    for name in os.listdir(cache_dir):
+        key = name.split('.', 1)[0]
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        names.setdefault(key, []).append(name)
+        sizes[key] = sizes.get(key, 0) + st.st_size
+        if name.endswith('.json'):
+            last_used[key] = st.st_mtime
+    total = sum(sizes.values())
+    for key in sorted(sizes, key=lambda k: last_used.get(k, 0)):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for name in names[key]:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass  # e.g. still mapped by another process on Windows
+        total -= sizes[key]
+    return total
+
+
+class FrameCache:
+    """Decoded grayscale frames of a video in memory-mapped chunk files.
+
+    Every analysis method only needs grayscale, so frames are cached after
+    ``cvtColor`` (and optional downscaling to *max_width*).  The cache is
+    keyed by video path, mtime and cached resolution; a memory-mapped byte
+    array marks which frames have been filled, so partial runs (clip
+    ranges, stopped analyses, segments) fill it incrementally.  Frames are
+    stored in files of ``_CHUNK_FRAMES`` consecutive frames, each created
+    when its first frame is cached, so disk use follows what is actually
+    cached.  When the frame cache outgrows *max_mb*, the least recently used
+    videos are evicted; if the current video alone would exceed it, further
+    frames are decoded but not cached.
+    """
+
+    def __init__(self, video_path, cache_dir=None, max_width=None, max_mb=DEFAULT_FRAME_CACHE_MB):
+        self.video_path = video_path
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'frames')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video {video_path}")
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        if max_width and width > max_width:
+            height = max(1, round(height * max_width / width))
+            width = max_width
+        self.width, self.height = width, height
+
+        path, mtime_ns, size = _video_stamp(video_path)
+        self.key = hashlib.sha1(
+            f"{path}|{mtime_ns}|{size}|{width}x{height}|chunks{_CHUNK_FRAMES}".encode()).hexdigest()
+        base = os.path.join(self.cache_dir, self.key)
+        self.valid_path = base + '.valid'
+        meta_path = base + '.json'
+
+        n_frames = max(self.total_frames, 1)
+        if not os.path.exists(meta_path):
+            np.memmap(self.valid_path, dtype=np.uint8, mode='w+', shape=(n_frames,)).flush()
+            with open(meta_path, 'w') as f:
+                json.dump({'video_path': path, 'mtime_ns': mtime_ns, 'size': size,
+                           'total_frames': self.total_frames, 'fps': self.fps,
+                           'width': width, 'height': height}, f, indent=4)
+        else:
+            os.utime(meta_path)  # mark as recently used
+
+        self.valid = np.memmap(self.valid_path, dtype=np.uint8, mode='r+', shape=(n_frames,))
+        self._chunks = {}
+        self._bytes = _evict_frame_caches(self.cache_dir, self.max_bytes, keep=self.key)
+
+    def _chunk_path(self, c):
+        return os.path.join(self.cache_dir, f"{self.key}.{c}.gray")
+
+    def _chunk(self, c, create=False):
+        """Memory map of chunk *c*, created if *create* and within budget; None otherwise."""
+        chunk = self._chunks.get(c)
+        if chunk is not None:
+            return chunk
+        path = self._chunk_path(c)
+        n = min(_CHUNK_FRAMES, max(self.total_frames, 1) - c * _CHUNK_FRAMES)
+        nbytes = n * self.height * self.width
+        if not os.path.exists(path):
+            if not create:
+                return None
+            if self._bytes + nbytes > self.max_bytes:
+                self._bytes = _evict_frame_caches(self.cache_dir, self.max_bytes - nbytes,
+                                                  keep=self.key)
+                if self._bytes + nbytes > self.max_bytes:
+                    return None
+            try:
+                with open(path, 'xb') as f:
+                    f.truncate(nbytes)
+            except FileExistsError:
+                pass  # created by another process (decode segments)
+            self._bytes += nbytes
+        chunk = np.memmap(path, dtype=np.uint8, mode='r+', shape=(n, self.height, self.width))
+        self._chunks[c] = chunk
+        return chunk
+
+    def frame(self, idx):
+        """Read-only view of cached frame *idx*, or None if it is not cached."""
+        if not self.valid[idx]:
+            return None
+        chunk = self._chunk(idx // _CHUNK_FRAMES)
+        if chunk is None:
+            return None
+        frame = chunk[idx % _CHUNK_FRAMES]
+        frame.flags.writeable = False
+        return frame
+
+    def store(self, idx, frame):
+        """Convert decoded frame *idx* to gray and cache it; returns the gray frame."""
+        gray = self.to_gray(frame)
+        chunk = self._chunk(idx // _CHUNK_FRAMES, create=True)
+        if chunk is None:
+            return gray  # over budget: serve it uncached
+        chunk[idx % _CHUNK_FRAMES] = gray
+        self.valid[idx] = 1
+        return self.frame(idx)
+
+    def to_gray(self, frame):
+        """Convert a decoded BGR frame to the cached grayscale representation."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if gray.shape != (self.height, self.width):
+            gray = cv2.resize(gray, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def capture(self):
+        return CachedCapture(self)
+
+    def flush(self):
+        for chunk in self._chunks.values():
+            chunk.flush()
+        self.valid.flush()
+
+
+class CachedCapture:
+    """``cv2.VideoCapture`` look-alike that serves frames from a :class:`FrameCache`.
+
+    Cached frames are returned as read-only views into the memory maps (no
+    copy, no decode).  Missing frames are decoded from the video, converted
+    to gray and written to the cache on the way through; frames skipped with
+    :meth:`grab` are neither decoded nor cached.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._pos = 0
+        self._cap = None
+        self._cap_pos = None
+        self._skipper = None
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.cache.total_frames
+        if prop == cv2.CAP_PROP_FPS:
+            return self.cache.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self._pos
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.cache.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.cache.height
+        return 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self._pos = int(value)
+            return True
+        return False
+
+    def _decode(self, idx):
+        """Decode frame *idx* from the video and cache it; returns the gray frame or None."""
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.cache.video_path)
+            self._cap_pos = 0
+            self._skipper = FrameSkipper(self._cap)
+        if self._cap_pos is not None and self._cap_pos < idx:
+            if not self._skipper.skip(self._cap_pos, idx):
+                self._cap_pos = None
+                return None
+        elif self._cap_pos != idx:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = self._cap.read()
+        self._cap_pos = idx + 1 if ret else None
+        if not ret:
+            return None
+        return self.cache.store(idx, frame)
+
+    def read(self):
+        idx = self._pos
+        if idx >= self.cache.total_frames:
+            return False, None
+        frame = self.cache.frame(idx)
+        if frame is None:
+            frame = self._decode(idx)
+            if frame is None:
+                return False, None
+        self._pos += 1
+        return True, frame
+
+    def grab(self):
+        """Advance past the current frame without decoding or caching it."""
+        if self._pos >= self.cache.total_frames:
+            return False
+        self._pos += 1
+        return True
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self.cache.flush()
+
+
+def open_capture(video_path, settings):
+    """Open *video_path* for decoding, through the frame cache if enabled in *settings*.
+
+    With ``settings['frame_cache']`` the returned capture yields cached
+    grayscale frames (see :class:`FrameCache`); otherwise a plain
+    ``cv2.VideoCapture``.
+    """
+    if settings.get('frame_cache'):
+        try:
+            cache = FrameCache(video_path, settings.get('cache_dir'),
+                               settings.get('frame_cache_max_width'),
+                               settings.get('frame_cache_max_mb', DEFAULT_FRAME_CACHE_MB))
+            return cache.capture()
+        except (IOError, OSError) as e:
+            print(f"Frame cache unavailable for {video_path}: {e}")
+    return cv2.VideoCapture(video_path)
+
+
+def video_fingerprint(video_path, chunk=1 << 20):
+    """Content fingerprint of a video: its size plus a hash of the first and last *chunk* bytes.
+
+    Unlike the path/mtime stamp it survives copying or renaming the file.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, 'rb') as f:
+        digest.update(f.read(chunk))
+        if size > chunk:
+            f.seek(max(chunk, size - chunk))
+            digest.update(f.read(chunk))
+    return digest.hexdigest()
+
+
+def settings_hash(settings):
+    """Canonical hash of the settings that determine per-frame results.
+
+    Sampling, clip range and parallelism only decide *which* frames are
+    analyzed and how, so jobs differing in those share cached frames.
+    Both engines produce identical results.
+    """
+    canonical = {k: v for k, v in settings.items()
+                 if k not in _RUNTIME_SETTINGS and v is not None}
+    if not settings.get('frame_cache'):
+        # Downscaling only applies to frames read through the frame cache
+        canonical.pop('frame_cache_max_width', None)
+    text = json.dumps(canonical, sort_keys=True, default=list)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """Per-frame analysis results persisted in SQLite, so stopped or crashed jobs resume.
+
+    Rows are keyed by job (video fingerprint + settings hash) and
+    ``frame_idx``; each stores the pickled result dictionary without its
+    preview images.  New results are committed at least every
+    *commit_interval* seconds.  When the cache outgrows *max_mb*, whole
+    least-recently-used jobs are evicted.
+    """
+
+    def __init__(self, video_path, settings, cache_dir=None, max_mb=DEFAULT_RESULT_CACHE_MB,
+                 commit_interval=1.0):
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.commit_interval = commit_interval
+        self.job = hashlib.sha1(
+            f"{video_fingerprint(video_path)}|{settings_hash(settings)}".encode()).hexdigest()
+
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'results.sqlite'), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (job TEXT PRIMARY KEY, video_path TEXT, "
+                          "last_used REAL, bytes INTEGER DEFAULT 0)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS frames (job TEXT, frame_idx INTEGER, "
+                          "result BLOB, PRIMARY KEY (job, frame_idx))")
+        self.conn.execute("INSERT INTO jobs (job, video_path, last_used) VALUES (?, ?, ?) "
+                          "ON CONFLICT(job) DO UPDATE SET last_used = excluded.last_used",
+                          (self.job, os.path.abspath(video_path), time.time()))
+        self.conn.commit()
+        self.evict()
+        self._last_commit = time.monotonic()
+
+    def load(self, frame_idxs):
+        """Cached results among *frame_idxs*, as a dict keyed by ``frame_idx``."""
+        wanted = set(frame_idxs)
+        if not wanted:
+            return {}
+        rows = self.conn.execute(
+            "SELECT frame_idx, result FROM frames WHERE job = ? AND frame_idx BETWEEN ? AND ?",
+            (self.job, min(wanted), max(wanted)))
+        return {idx: pickle.loads(blob) for idx, blob in rows if idx in wanted}
+
+    def put(self, result):
+        stored = {k: v for k, v in result.items() if k not in ('frame', 'edges')}
+        self.conn.execute("INSERT OR REPLACE INTO frames (job, frame_idx, result) VALUES (?, ?, ?)",
+                          (self.job, int(result['frame_idx']), pickle.dumps(stored)))
+        if time.monotonic() - self._last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        self.conn.execute("UPDATE jobs SET last_used = ?, bytes = (SELECT COALESCE(SUM(LENGTH(result)), 0) "
+                          "FROM frames WHERE job = ?) WHERE job = ?",
+                          (time.time(), self.job, self.job))
+        self.conn.commit()
+        self._last_commit = time.monotonic()
+
+    def evict(self):
+        """Drop least-recently-used jobs (never the current one) until under the size budget."""
+        total = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM jobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for job, size in self.conn.execute(
+                "SELECT job, bytes FROM jobs WHERE job != ? ORDER BY last_used", (self.job,)).fetchall():
+            self.conn.execute("DELETE FROM frames WHERE job = ?", (job,))
+            self.conn.execute("DELETE FROM jobs WHERE job = ?", (job,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.evict()
+        self.conn.close()
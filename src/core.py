@@ -2,31 +2,231 @@ import math
 
 import cv2
 import numpy as np
-import scipy.stats
 
-try:
-    import cupy as cp
-    GPU_AVAILABLE = True
-except ImportError:
-    cp = None
-    GPU_AVAILABLE = False
+from src import profiling
+
+# cupy is imported on first use, so importing the core stays cheap
+_cupy = None  # cupy module once probed, False if it is not installed
+
+
+def _get_cupy():
+    global _cupy
+    if _cupy is None:
+        try:
+            import cupy
+            _cupy = cupy
+        except ImportError:
+            _cupy = False
+    return _cupy or None
+
+
+def gpu_available():
+    """True if cupy (CUDA) can be used; probes for it on the first call."""
+    return _get_cupy() is not None
+
+
+def __getattr__(name):
+    # Module attributes kept for compatibility, resolved lazily
+    if name == 'GPU_AVAILABLE':
+        return gpu_available()
+    if name == 'cp':
+        return _get_cupy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _to_gpu(arr):
-    return cp.asarray(arr) if GPU_AVAILABLE else arr
+    cp = _get_cupy()
+    return cp.asarray(arr) if cp is not None else arr
 
 
 def _to_cpu(arr):
-    return cp.asnumpy(arr) if GPU_AVAILABLE and isinstance(arr, cp.ndarray) else arr
+    cp = _get_cupy()
+    return cp.asnumpy(arr) if cp is not None and isinstance(arr, cp.ndarray) else arr
+
+
+def _linregress(x, y):
+    """Closed-form least-squares line fit, matching ``scipy.stats.linregress``.
+
+    *y* is one series (k,) or a batch (B, k) fitted row by row, against
+    *x* (k,) shared by all rows or (B, k) per row.  NaN points are left out
+    of their row's fit, so NaN-padded rows of different lengths can be
+    fitted in one call.  Returns (slope, intercept, r_value): scalars for
+    one series, length-B arrays for a batch.  r_value is NaN for a constant
+    series and 0 if only one of x, y is constant, as in linregress; rows
+    with fewer than two points give NaN.
+    """
+    y = np.asarray(y, dtype=float)
+    single = y.ndim == 1
+    Y = np.atleast_2d(y)
+    X = np.broadcast_to(np.asarray(x, dtype=float), Y.shape)
+
+    valid = ~(np.isnan(X) | np.isnan(Y))
+    if valid.all():
+        x_mean = X.mean(axis=1)
+        y_mean = Y.mean(axis=1)
+        dx = X - x_mean[:, None]
+        dy = Y - y_mean[:, None]
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n = valid.sum(axis=1)
+            x_mean = np.where(valid, X, 0.0).sum(axis=1) / n
+            y_mean = np.where(valid, Y, 0.0).sum(axis=1) / n
+        dx = np.where(valid, X - x_mean[:, None], 0.0)
+        dy = np.where(valid, Y - y_mean[:, None], 0.0)
+    ssx = np.einsum('ij,ij->i', dx, dx)
+    ssy = np.einsum('ij,ij->i', dy, dy)
+    sxy = np.einsum('ij,ij->i', dx, dy)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / ssx
+        intercept = y_mean - slope * x_mean
+        r_value = np.where((ssx == 0) | (ssy == 0),
+                           np.where(sxy == 0, np.nan, 0.0),
+                           sxy / np.sqrt(ssx * ssy))
+    r_value = np.clip(r_value, -1.0, 1.0)
+    if single:
+        return slope[0], intercept[0], r_value[0]
+    return slope, intercept, r_value
+
+
+def _threshold_levels(thresholds):
+    """uint8 levels of Moisy threshold fractions (``int(t * 255)``); None means all 256."""
+    if thresholds is None:
+        return np.arange(256)
+    return np.array([int(t * 255) for t in np.atleast_1d(thresholds)], dtype=np.int64)
+
+
+def _pool2x2(level, xp, reduce, pad_mode):
+    """One 2×2 pooling step over the last two axes of *level*.
+
+    Odd sizes are padded by one row/column first (*pad_mode* as in ``xp.pad``),
+    so level k of the pyramid covers exactly the boxes of size 2**k of the
+    original image padded to a multiple of 2**k.
+    """
+    h, w = level.shape[-2:]
+    if h % 2 or w % 2:
+        pad = [(0, 0)] * (level.ndim - 2) + [(0, h % 2), (0, w % 2)]
+        level = xp.pad(level, pad, mode=pad_mode)
+    top = reduce(level[..., 0::2, 0::2], level[..., 0::2, 1::2])
+    bottom = reduce(level[..., 1::2, 0::2], level[..., 1::2, 1::2])
+    return reduce(top, bottom)
+
+
+# For a packed byte, the OR of each bit pair (b7|b6, b5|b4, b3|b2, b1|b0)
+# as a 4-bit nibble, most significant pair first.
+_PAIR_OR = np.array([sum(((i >> (2 * k)) & 3 != 0) << k for k in range(4))
+                     for i in range(256)], dtype=np.uint8)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(packed):
+    """Number of set bits in a uint8 array."""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(packed).sum())
+    return int(_POPCOUNT[packed].sum())
+
+
+# Box-counting engines: 'pyramid' derives each scale from the previous one
+# (bit-packed for Moisy), 'reference' re-pads and reduces the full image at
+# every scale and runs Moisy's boxcount on a full (2**p, 2**p) bool array.
+ENGINES = ('pyramid', 'reference')
+
+# Chaos-game moves that still affect a point at float64 resolution
+# (0.5**64 of any coordinate is far below one ulp of the newest term)
+_CHAOS_GAME_MEMORY = 64
 
 
 class FractalAnalyzer:
-    def __init__(self):
-        self.use_gpu = GPU_AVAILABLE
+    def __init__(self, engine='pyramid'):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+        self.use_gpu = gpu_available()
+        self.engine = engine
 
     @property
     def xp(self):
-        return cp if self.use_gpu and GPU_AVAILABLE else np
+        return _get_cupy() if self.use_gpu else np
+
+    # ------------------------------------------------------------------
+    # Box-count engines
+    # ------------------------------------------------------------------
+
+    def _binary_box_counts(self, pixels):
+        """Yield (box_size, non-empty box count) for box sizes 2, 4, ... <= min(H, W) // 2.
+
+        Works on the last two axes, so *pixels* may be one (H, W) image or a
+        (B, H, W) stack (counts are then length-B arrays).
+        """
+        xp = self.xp
+        H, W = pixels.shape[-2:]
+        MinimalDim = min(H, W)
+
+        if self.engine == 'pyramid':
+            # Level k+1 is the 2×2 OR of level k: ~4/3·H·W work in total
+            level = pixels > 0
+            box_size = 2
+            while box_size <= MinimalDim // 2:
+                level = _pool2x2(level, xp, xp.logical_or, 'constant')
+                yield box_size, xp.count_nonzero(level, axis=(-2, -1))
+                box_size *= 2
+            return
+
+        box_size = 2
+        while box_size <= MinimalDim // 2:
+            pad_h = (box_size - (H % box_size)) % box_size
+            pad_w = (box_size - (W % box_size)) % box_size
+
+            if pad_h > 0 or pad_w > 0:
+                pad = [(0, 0)] * (pixels.ndim - 2) + [(0, pad_h), (0, pad_w)]
+                padded = xp.pad(pixels, pad, mode='constant')
+            else:
+                padded = pixels
+
+            sh = padded.shape
+            reshaped = padded.reshape(sh[:-2] + (sh[-2] // box_size, box_size,
+                                                 sh[-1] // box_size, box_size))
+            block_sums = reshaped.sum(axis=(-3, -1))
+
+            yield box_size, xp.count_nonzero(block_sums, axis=(-2, -1))
+
+            box_size *= 2
+
+    def _gray_box_extrema(self, pixels):
+        """Yield (box_size, box minima, box maxima) for box sizes 2, 4, ... <= min(H, W) // 4.
+
+        Partial boxes at the bottom/right edges are padded by edge replication.
+        """
+        xp = self.xp
+        H, W = pixels.shape
+        MinimalDim = min(H, W)
+
+        if self.engine == 'pyramid':
+            # Min/max pyramids: each level pools the previous one
+            mins = maxs = pixels
+            box_size = 2
+            while box_size <= MinimalDim // 4:
+                mins = _pool2x2(mins, xp, xp.minimum, 'edge')
+                maxs = _pool2x2(maxs, xp, xp.maximum, 'edge')
+                yield box_size, mins, maxs
+                box_size *= 2
+            return
+
+        box_size = 2
+        while box_size <= MinimalDim // 4:
+            pad_h = (box_size - (H % box_size)) % box_size
+            pad_w = (box_size - (W % box_size)) % box_size
+
+            if pad_h > 0 or pad_w > 0:
+                padded = xp.pad(pixels, ((0, pad_h), (0, pad_w)), mode='edge')
+            else:
+                padded = pixels
+
+            sh = padded.shape
+            reshaped = padded.reshape(sh[0] // box_size, box_size, sh[1] // box_size, box_size)
+
+            yield box_size, reshaped.min(axis=(1, 3)), reshaped.max(axis=(1, 3))
+
+            box_size *= 2
 
     def preprocess_frame(self, frame, method='canny', threshold_mode='auto', 
                          manual_thresholds=(100, 200), blur_kernel=(5, 5)):
@@ -41,29 +241,34 @@ class FractalAnalyzer:
             # Already grayscale
             gray = frame
         else:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            with profiling.stage('cvtColor'):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         if blur_kernel:
-            gray = cv2.GaussianBlur(gray, blur_kernel, 0)
+            with profiling.stage('GaussianBlur'):
+                gray = cv2.GaussianBlur(gray, blur_kernel, 0)
             
         if method == 'canny':
-            if threshold_mode == 'auto':
-                median = np.median(gray)
-                lower = int(max(0, 0.66 * median))
-                upper = int(min(255, 1.33 * median))
-                edges = cv2.Canny(gray, lower, upper)
-            else:
-                edges = cv2.Canny(gray, manual_thresholds[0], manual_thresholds[1])
+            with profiling.stage('Canny'):
+                if threshold_mode == 'auto':
+                    median = np.median(gray)
+                    lower = int(max(0, 0.66 * median))
+                    upper = int(min(255, 1.33 * median))
+                    edges = cv2.Canny(gray, lower, upper)
+                else:
+                    edges = cv2.Canny(gray, manual_thresholds[0], manual_thresholds[1])
         elif method == 'sobel':
-            sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-            sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-            magnitude = np.sqrt(sobelx**2 + sobely**2)
-            # Normalize and threshold
-            magnitude = np.uint8(255 * magnitude / np.max(magnitude))
-            _, edges = cv2.threshold(magnitude, manual_thresholds[0], 255, cv2.THRESH_BINARY)
+            with profiling.stage('Sobel'):
+                sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+                sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+                magnitude = np.sqrt(sobelx**2 + sobely**2)
+                # Normalize and threshold
+                magnitude = np.uint8(255 * magnitude / np.max(magnitude))
+                _, edges = cv2.threshold(magnitude, manual_thresholds[0], 255, cv2.THRESH_BINARY)
         else:
              # Default fallback
-             edges = cv2.Canny(gray, 100, 200)
+             with profiling.stage('Canny'):
+                 edges = cv2.Canny(gray, 100, 200)
 
         # Ensure binary (0 or 1) for box counting, though Canny gives 0/255
         # We'll treat > 0 as edge
@@ -77,48 +282,28 @@ class FractalAnalyzer:
         if binary_image is None or np.sum(binary_image) == 0:
             return 0.0, 0.0, [], [], False
 
-        xp = self.xp
-
-        # Ensure binary 0/1 (use uint8 to minimize memory)
-        pixels = _to_gpu((binary_image > 0).astype(np.uint8))
-
-        # Minimal dimension
-        H, W = pixels.shape
-        MinimalDim = min(H, W)
-
         scales = []
         counts = []
 
-        box_size = 2
-        while box_size <= MinimalDim // 2:
-            pad_h = (box_size - (H % box_size)) % box_size
-            pad_w = (box_size - (W % box_size)) % box_size
-
-            if pad_h > 0 or pad_w > 0:
-                padded = xp.pad(pixels, ((0, pad_h), (0, pad_w)), mode='constant')
-            else:
-                padded = pixels
+        with profiling.stage('box_count'):
+            # Ensure binary 0/1 (use uint8 to minimize memory)
+            pixels = _to_gpu((binary_image > 0).astype(np.uint8))
 
-            sh = padded.shape
-            reshaped = padded.reshape(sh[0] // box_size, box_size, sh[1] // box_size, box_size)
-            block_sums = reshaped.sum(axis=(1, 3))
-
-            non_empty_blocks = int(xp.count_nonzero(block_sums))
-
-            if non_empty_blocks > 0:
-                scales.append(1.0 / box_size)
-                counts.append(non_empty_blocks)
-
-            box_size *= 2
+            for box_size, non_empty_blocks in self._binary_box_counts(pixels):
+                non_empty_blocks = int(non_empty_blocks)
+                if non_empty_blocks > 0:
+                    scales.append(1.0 / box_size)
+                    counts.append(non_empty_blocks)
 
         if len(scales) < 2:
             return 0.0, 0.0, [], [], False
 
-        # linregress on CPU (small arrays)
+        # Line fit on CPU (small arrays)
         log_scales = np.log(scales)
         log_counts = np.log(counts)
 
-        slope, intercept, r_value, p_value, std_err = scipy.stats.linregress(log_scales, log_counts)
+        with profiling.stage('fit'):
+            slope, intercept, r_value = _linregress(log_scales, log_counts)
 
         D = slope  # D is the slope of log(N) vs log(1/s)
         R_squared = r_value ** 2
@@ -131,53 +316,79 @@ class FractalAnalyzer:
 
         return D, R_squared, log_scales, log_counts, reliable
 
-    def differential_box_count(self, grayscale_image):
-        """
-        Differential Box Counting (DBC) for grayscale images.
-        """
-        if grayscale_image is None:
-            return 0.0, 0.0, [], []
+    def box_count_batch(self, binary_stack, r2_threshold=0.90):
+        """Box-count a (B, H, W) stack of binary frames in one vectorized pass per scale.
 
-        xp = self.xp
-        H, W = grayscale_image.shape
-        MinimalDim = min(H, W)
+        Equivalent to calling :meth:`box_count` on every frame, but the box
+        sums for all frames are computed together and all B regressions are
+        solved as one matrix operation.
+
+        Returns: D (B,), R_squared (B,), log_scales (k,), log_counts (B, k),
+        reliable (B,).  Empty frames get D = R² = 0, NaN log counts and
+        reliable = False.
+        """
+        stack = _to_gpu((np.asarray(binary_stack) > 0).astype(np.uint8))
+        B = stack.shape[0]
 
-        pixels = _to_gpu(grayscale_image)
+        D = np.zeros(B)
+        R_squared = np.zeros(B)
+        reliable = np.zeros(B, dtype=bool)
 
         scales = []
         counts = []
 
-        box_size = 2
-        while box_size <= MinimalDim // 4:
-            pad_h = (box_size - (H % box_size)) % box_size
-            pad_w = (box_size - (W % box_size)) % box_size
+        for box_size, non_empty_blocks in self._binary_box_counts(stack):
+            scales.append(1.0 / box_size)
+            counts.append(_to_cpu(non_empty_blocks))
 
-            if pad_h > 0 or pad_w > 0:
-                padded = xp.pad(pixels, ((0, pad_h), (0, pad_w)), mode='edge')
-            else:
-                padded = pixels
+        # Any foreground pixel occupies at least one box at every scale, so
+        # only empty frames have zero counts.
+        counts = np.stack(counts, axis=1) if counts else np.zeros((B, 0), dtype=np.int64)
+        occupied = counts[:, 0] > 0 if len(scales) else np.zeros(B, dtype=bool)
 
-            sh = padded.shape
-            reshaped = padded.reshape(sh[0] // box_size, box_size, sh[1] // box_size, box_size)
+        log_scales = np.log(scales)
+        with np.errstate(divide='ignore'):
+            log_counts = np.log(counts.astype(float))
+        log_counts[~occupied] = np.nan
 
-            mins = reshaped.min(axis=(1, 3))
-            maxs = reshaped.max(axis=(1, 3))
+        if len(scales) < 2 or not np.any(occupied):
+            return D, R_squared, log_scales, log_counts, reliable
 
-            rs = maxs - mins + 1
-            N_s = int(xp.sum(rs))
+        slope, _, r_value = _linregress(log_scales, log_counts[occupied])
+        R_squared[occupied] = r_value ** 2
+        reliable[occupied] = (R_squared[occupied] >= r2_threshold) & (slope >= 1.0) & (slope <= 2.0)
+        D[occupied] = np.clip(slope, 1.0, 2.0)
 
-            if N_s > 0:
-                scales.append(1.0 / box_size)
-                counts.append(N_s)
+        return D, R_squared, log_scales, log_counts, reliable
 
-            box_size *= 2
+    def differential_box_count(self, grayscale_image):
+        """
+        Differential Box Counting (DBC) for grayscale images.
+        """
+        if grayscale_image is None:
+            return 0.0, 0.0, [], []
+
+        scales = []
+        counts = []
+
+        with profiling.stage('differential_box_count'):
+            pixels = _to_gpu(grayscale_image)
+
+            for box_size, mins, maxs in self._gray_box_extrema(pixels):
+                rs = maxs - mins + 1
+                N_s = int(self.xp.sum(rs))
+
+                if N_s > 0:
+                    scales.append(1.0 / box_size)
+                    counts.append(N_s)
 
         if len(scales) < 2:
             return 0.0, 0.0, [], []
 
         log_scales = np.log(scales)
         log_counts = np.log(counts)
-        slope, _, r_value, _, _ = scipy.stats.linregress(log_scales, log_counts)
+        with profiling.stage('fit'):
+            slope, _, r_value = _linregress(log_scales, log_counts)
         
         return slope, r_value**2, log_scales, log_counts
 
@@ -189,29 +400,30 @@ class FractalAnalyzer:
         if grayscale_image is None:
             return 0.0, 0.0, [], []
 
-        xp = self.xp
-        img_gpu = _to_gpu(grayscale_image.astype(np.float64))
+        with profiling.stage('fourier_slope'):
+            xp = self.xp
+            img_gpu = _to_gpu(grayscale_image.astype(np.float64))
 
-        # FFT2
-        f = xp.fft.fft2(img_gpu)
-        fshift = xp.fft.fftshift(f)
+            # FFT2
+            f = xp.fft.fft2(img_gpu)
+            fshift = xp.fft.fftshift(f)
 
-        # Radial Profile
-        h, w = grayscale_image.shape
-        center = (h // 2, w // 2)
-        y, x = xp.ogrid[:h, :w]
-        r = xp.sqrt((x - center[1])**2 + (y - center[0])**2)
+            # Radial Profile
+            h, w = grayscale_image.shape
+            center = (h // 2, w // 2)
+            y, x = xp.ogrid[:h, :w]
+            r = xp.sqrt((x - center[1])**2 + (y - center[0])**2)
 
-        r_int = r.astype(int)
+            r_int = r.astype(int)
 
-        power_spectrum = xp.abs(fshift)**2
+            power_spectrum = xp.abs(fshift)**2
 
-        # Radial average
-        tbin = xp.bincount(r_int.ravel(), power_spectrum.ravel())
-        nr = xp.bincount(r_int.ravel())
-        radial_profile = _to_cpu(tbin / xp.maximum(nr, 1))
+            # Radial average
+            tbin = xp.bincount(r_int.ravel(), power_spectrum.ravel())
+            nr = xp.bincount(r_int.ravel())
+            radial_profile = _to_cpu(tbin / xp.maximum(nr, 1))
 
-        # Back to CPU for linregress
+        # Back to CPU for the line fit
         max_r = min(h, w) // 2
         freqs = np.arange(1, max_r)
         powers = radial_profile[1:max_r]
@@ -225,7 +437,8 @@ class FractalAnalyzer:
             
         # Fit P(f) proportional to f^(-beta)
         # log(P) = -beta * log(f) + C
-        slope, _, r_value, _, _ = scipy.stats.linregress(log_freqs, log_powers)
+        with profiling.stage('fit'):
+            slope, _, r_value = _linregress(log_freqs, log_powers)
         
         beta = -slope
         # D = (8 - beta) / 2 for 2D surfaces, approximation
@@ -244,6 +457,9 @@ class FractalAnalyzer:
 
         Returns (n, r) where n[g] is the box count at scale r[g] = 2**g.
         """
+        if self.engine == 'pyramid':
+            return self._moisy_boxcount_packed(binary_image)
+
         width = max(binary_image.shape)
         p = math.ceil(math.log2(width))
         width = 2 ** p
@@ -267,12 +483,53 @@ class FractalAnalyzer:
 
         return n, r
 
+    def _moisy_boxcount_packed(self, binary_image):
+        """Bit-packed :meth:`moisy_boxcount`: identical (n, r), ~8× less memory.
+
+        Rows are packed 8 pixels per byte with ``np.packbits``.  Each level
+        ORs pairs of packed rows, then merges the 2×2 OR of two adjacent
+        bytes into one byte via a lookup table, and counts boxes by popcount.
+        The zero padding to (2**p, 2**p) is never materialized: it cannot
+        contain foreground and so never changes a count.
+        """
+        width = max(binary_image.shape)
+        p = math.ceil(math.log2(width))
+
+        n = np.zeros(p + 1, dtype=np.int64)
+        r = 2 ** np.arange(p + 1, dtype=np.int64)
+
+        packed = np.packbits(binary_image, axis=1)
+        n[0] = _popcount(packed)
+
+        g = 1
+        # Packed coarsening needs two bytes per row to merge horizontally
+        while g <= p and packed.shape[1] >= 2:
+            rows, cols = packed.shape
+            if rows % 2 or cols % 2:
+                packed = np.pad(packed, ((0, rows % 2), (0, cols % 2)))
+            packed = packed[0::2] | packed[1::2]
+            packed = (_PAIR_OR[packed[:, 0::2]] << 4) | _PAIR_OR[packed[:, 1::2]]
+            n[g] = _popcount(packed)
+            g += 1
+
+        # The last few (tiny) levels run on plain booleans
+        c = np.unpackbits(packed, axis=1).astype(bool)
+        for g in range(g, p + 1):
+            c = _pool2x2(c, np, np.logical_or, 'constant')
+            n[g] = int(np.count_nonzero(c))
+
+        return n, r
+
     def moisy_fractal_dimension(self, n, r, scale_range=(4, 8)):
         """Compute D from local slopes, averaged over *scale_range*.
 
         *scale_range* uses MATLAB 1-based indexing into the df array
         (length p).  MATLAB ``df(4:8)`` → Python ``df[3:8]``.
 
+        *n* may also be a (T, p+1) array of counts sharing the same *r*
+        (e.g. from :meth:`moisy_boxcount_thresholds`); D and D_std are then
+        length-T arrays.
+
         Returns (D, D_std, df_array).
         """
         with np.errstate(divide='ignore', invalid='ignore'):
@@ -280,14 +537,21 @@ class FractalAnalyzer:
             log_r = np.log(r.astype(float))
 
             # Local slopes (length = len(n) - 1 = p)
-            df = -np.diff(log_n) / np.diff(log_r)
+            df = -np.diff(log_n, axis=-1) / np.diff(log_r)
 
         lo = scale_range[0] - 1          # MATLAB→Python
         hi = scale_range[1]              # Python slice end is exclusive
 
         # Clamp to valid range
         lo = max(0, lo)
-        hi = min(len(df), hi)
+        hi = min(df.shape[-1], hi)
+
+        if df.ndim > 1:
+            if hi <= lo:
+                return np.zeros(df.shape[:-1]), np.zeros(df.shape[:-1]), df
+            with np.errstate(invalid='ignore'):
+                return (np.mean(df[..., lo:hi], axis=-1),
+                        np.std(df[..., lo:hi], axis=-1), df)
 
         if hi <= lo:
             return 0.0, 0.0, df
@@ -296,6 +560,74 @@ class FractalAnalyzer:
         D_std = float(np.std(df[lo:hi]))
         return D, D_std, df
 
+    def moisy_boxcount_thresholds(self, grayscale_image, thresholds=None):
+        """Moisy box counts for many binarization thresholds in one pass.
+
+        A box is occupied at threshold level t exactly when its maximum
+        exceeds t, so a single max-pool pyramid of the uint8 grayscale frame
+        gives the counts for every threshold: at each level a 256-bin
+        histogram of box maxima is turned into "boxes above t" counts.
+
+        *thresholds* are fractions (0–1) as in :meth:`analyze_frame_moisy`,
+        converted to levels with ``int(t * 255)``; None means all 256 levels.
+
+        Returns (n, r, levels): n is (T, p+1) with n[i] equal to
+        ``moisy_boxcount(gray > levels[i])[0]``, r is the shared scale array.
+        """
+        gray = np.asarray(grayscale_image)
+        if gray.dtype != np.uint8:
+            raise ValueError("moisy_boxcount_thresholds expects a uint8 grayscale image")
+
+        levels = _threshold_levels(thresholds)
+
+        width = max(gray.shape)
+        p = math.ceil(math.log2(width))
+        n = np.zeros((len(levels), p + 1), dtype=np.int64)
+        r = 2 ** np.arange(p + 1, dtype=np.int64)
+
+        # boxes_above[t] = number of boxes whose maximum is > t
+        def boxes_above(level):
+            hist = np.bincount(level.ravel(), minlength=256)
+            at_least = np.cumsum(hist[::-1])[::-1]
+            # at_least[k] counts maxima >= k, i.e. > k - 1
+            return np.append(at_least, 0)[np.clip(levels, -1, 255) + 1]
+
+        level = gray
+        n[:, 0] = boxes_above(level)
+        for g in range(1, p + 1):
+            # Zero padding never exceeds a threshold, like Moisy's zero pad
+            level = _pool2x2(level, np, np.maximum, 'constant')
+            n[:, g] = boxes_above(level)
+
+        return n, r, levels
+
+    def analyze_frame_moisy_thresholds(self, frame, thresholds=None, scale_range=(4, 8)):
+        """Moisy D for a vector of thresholds (or all 256 levels) from one pyramid.
+
+        Equivalent to calling :meth:`analyze_frame_moisy` once per threshold.
+        Frames with no foreground at a threshold get D = D_std = 0.
+
+        Returns (D, D_std, n, r, levels) with D, D_std of length T.
+        """
+        if frame is None or frame.size == 0:
+            levels = _threshold_levels(thresholds)
+            zeros = np.zeros(len(levels))
+            return zeros, zeros.copy(), np.zeros((len(levels), 0), dtype=np.int64), np.array([]), levels
+
+        if len(frame.shape) == 3:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = frame
+
+        n, r, levels = self.moisy_boxcount_thresholds(gray, thresholds)
+        D, D_std, _ = self.moisy_fractal_dimension(n, r, scale_range)
+
+        # Guard against NaN from degenerate (e.g. all-black) thresholds
+        empty = n[:, 0] == 0
+        D = np.where(empty | np.isnan(D), 0.0, D)
+        D_std = np.where(empty | np.isnan(D_std), 0.0, D_std)
+        return D, D_std, n, r, levels
+
     def analyze_frame_moisy(self, frame, threshold=0.25, scale_range=(4, 8)):
         """Full per-frame pipeline for Moisy method.
 
@@ -310,15 +642,18 @@ class FractalAnalyzer:
         else:
             gray = frame
 
-        _, bw = cv2.threshold(gray, int(threshold * 255), 1, cv2.THRESH_BINARY)
-        bw = bw.astype(bool)
+        with profiling.stage('threshold'):
+            _, bw = cv2.threshold(gray, int(threshold * 255), 1, cv2.THRESH_BINARY)
+            bw = bw.astype(bool)
 
         if not np.any(bw):
             # Completely black frame — no foreground pixels
             return 0.0, 0.0, np.array([0]), np.array([1]), np.array([]), bw
 
-        n, r = self.moisy_boxcount(bw)
-        D, D_std, df = self.moisy_fractal_dimension(n, r, scale_range)
+        with profiling.stage('moisy_boxcount'):
+            n, r = self.moisy_boxcount(bw)
+        with profiling.stage('fit'):
+            D, D_std, df = self.moisy_fractal_dimension(n, r, scale_range)
 
         # Guard against NaN from degenerate frames
         if np.isnan(D):
@@ -357,14 +692,133 @@ class FractalAnalyzer:
 
         # Pre-generate all random vertex choices at once
         choices = rng.integers(0, 3, size=n_points)
+        targets = vertices[choices]
+
+        # Each move goes halfway toward the chosen vertex, so point k is the
+        # closed-form sum  0.5**(k+1) * start + sum_m 0.5**(m+1) * targets[k-m].
+        # Terms older than _CHAOS_GAME_MEMORY moves are below float64
+        # resolution; the window sum is built by doubling its span.
+        points = 0.5 * targets
+        span = 1
+        while span < min(n_points, _CHAOS_GAME_MEMORY):
+            points[span:] = points[span:] + 0.5 ** span * points[:-span]
+            span *= 2
+        first = min(n_points, _CHAOS_GAME_MEMORY)
+        points[:first] += 0.5 ** np.arange(1, first + 1)[:, None] * point
+
+        px = points[:, 0].astype(np.int64)
+        py = points[:, 1].astype(np.int64)
+        inside = (px >= 0) & (px < size) & (py >= 0) & (py < size)
+        image[py[inside], px[inside]] = 255
+
+        return image
+
+    def generate_fbm_surface(self, size=512, hurst=0.5, seed=0):
+        """
+        Generates a fractional Brownian surface by spectral synthesis.
+
+        White noise is filtered in the Fourier domain so the power spectrum
+        falls off as f**-beta with beta = 2 * hurst + 2, the surface
+        counterpart of ``fourier_slope``'s D = (8 - beta) / 2, so the known
+        dimension is D = 3 - hurst.  ``differential_box_count`` reports
+        lower values on its own scale but orders surfaces the same way.
 
-        # Run the chaos game: move halfway toward a randomly chosen vertex
-        for idx in choices:
-            point = (point + vertices[idx]) / 2.0
-            px, py = int(point[0]), int(point[1])
-            if 0 <= px < size and 0 <= py < size:
-                image[py, px] = 255
+        Args:
+            size: Image dimension in pixels (square image).
+            hurst: Hurst exponent in (0, 1); rougher surfaces for smaller values.
+            seed: Seed of the random phases.
+
+        Returns a uint8 grayscale image spanning 0–255.
+        """
+        rng = np.random.default_rng(seed)
+        spectrum = np.fft.rfft2(rng.standard_normal((size, size)))
+        fy = np.fft.fftfreq(size)[:, None]
+        fx = np.fft.rfftfreq(size)[None, :]
+        f = np.sqrt(fx ** 2 + fy ** 2)
+        f[0, 0] = np.inf  # no DC component
+        spectrum *= f ** -(hurst + 1.0)  # amplitude ~ f**(-beta / 2)
+        surface = np.fft.irfft2(spectrum, s=(size, size))
+        surface -= surface.min()
+        surface *= 255.0 / max(surface.max(), 1e-12)
+        return surface.astype(np.uint8)
+
+    def generate_koch_curve(self, size=512, order=None):
+        """
+        Generates a Koch curve, a self-similar test pattern for box counting.
+
+        The ideal curve has D = log(4)/log(3) ≈ 1.2619, but this is not a
+        ground truth for ``box_count``: its dyadic boxes do not align with
+        the triadic construction, and on the raster it measures 1.17–1.25
+        depending on size and placement.  All segments of each iteration
+        are subdivided at once (as complex numbers) and the polyline is
+        drawn one pixel wide.
 
+        Args:
+            size: Image dimension in pixels (square image).
+            order: Number of iterations; by default the largest for which
+                   the shortest segment is still at least one pixel long.
+        """
+        image = np.zeros((size, size), dtype=np.uint8)
+        margin = size // 20
+        width = size - 2 * margin
+        if order is None:
+            order = max(int(math.log(width) / math.log(3)), 0)
+
+        points = np.array([0.0, 1.0], dtype=np.complex128)
+        peak = np.exp(-1j * np.pi / 3)  # image y axis points down: bump upwards
+        for _ in range(order):
+            a, b = points[:-1], points[1:]
+            third = (b - a) / 3
+            new = np.empty(4 * len(a) + 1, dtype=np.complex128)
+            new[0:-1:4] = a
+            new[1::4] = a + third
+            new[2::4] = a + third + third * peak
+            new[3::4] = a + 2 * third
+            new[-1] = points[-1]
+            points = new
+
+        # The curve rises sqrt(3)/6 of its width above the baseline
+        baseline = (size + width * math.sqrt(3) / 6) / 2
+        xy = np.stack([margin + points.real * width, baseline + points.imag * width], axis=1)
+        cv2.polylines(image, [np.round(xy).astype(np.int32)], False, 255, 1)
+        return image
+
+    def generate_cantor_set(self, size=729, pattern='dust', order=None):
+        """
+        Generates a self-similar Cantor-type set on a 3x3 subdivision.
+
+        ``pattern='dust'`` keeps the four corner cells (Cantor dust,
+        D = log(4)/log(3) ≈ 1.2619); ``'carpet'`` keeps all but the centre
+        cell (Sierpinski carpet, D = log(8)/log(3) ≈ 1.8928).  The set is
+        built by Kronecker products and placed in the top-left corner.
+        These are the dimensions of the ideal sets, not a ground truth for
+        ``box_count``, whose dyadic boxes measure them up to 0.1 off
+        depending on size and order.
+
+        Args:
+            size: Image dimension in pixels (square image).
+            pattern: 'dust' or 'carpet'.
+            order: Number of subdivisions; by default the largest with
+                   3**order <= size.
+        """
+        kernels = {
+            'dust': np.array([[1, 0, 1], [0, 0, 0], [1, 0, 1]], dtype=np.uint8),
+            'carpet': np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8),
+        }
+        if pattern not in kernels:
+            raise ValueError(f"Unknown pattern {pattern!r}, expected one of {tuple(kernels)}")
+        if order is None:
+            order = 0
+            while 3 ** (order + 1) <= size:
+                order += 1
+
+        cells = np.ones((1, 1), dtype=np.uint8)
+        for _ in range(order):
+            cells = np.kron(cells, kernels[pattern])
+
+        image = np.zeros((size, size), dtype=np.uint8)
+        n = min(len(cells), size)
+        image[:n, :n] = cells[:n, :n] * 255
         return image
 
     def generate_square(self, size=512, filled=False):
@@ -4,20 +4,24 @@ import ctypes
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout,
                              QHBoxLayout, QWidget, QPushButton, QFileDialog,
                              QProgressBar, QGroupBox, QFormLayout, QSpinBox,
-                             QDoubleSpinBox, QSlider, QTimeEdit,
+                             QDoubleSpinBox, QSlider, QTimeEdit, QCheckBox,
                              QComboBox, QSplitter, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView)
 from PyQt5.QtCore import Qt, QTime
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtGui import QPixmap
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-import pandas as pd
 import cv2
 import numpy as np
-import json
 from src.workers import AnalysisThread
-from src.core import GPU_AVAILABLE
+from src import profiling
+from src.core import gpu_available
+from src.stats import StreamingStats
+from src.store import CountStore, ResultStore
+from src.timeline import BlittedTimeline
+from src.utils import (batch_output_paths, save_results_binary, save_results_to_csv,
+                       save_summary_json, summarize_results)
+from src.writer import StreamingResultWriter
 
 # --- Dark Theme Colors ---
 BG_DARK = "#1a1a2e"
@@ -30,6 +34,17 @@ BORDER = "#333333"
 ERROR_RED = "#e74c3c"
 SUCCESS_GREEN = "#2ecc71"
 
+# Profile tab columns: (header, report key, number format)
+PROFILE_COLUMNS = [
+    ("Calls", 'calls', 'd'),
+    ("Total (s)", 'total_s', '.3f'),
+    ("Mean (ms)", 'mean_ms', '.2f'),
+    ("p50 (ms)", 'p50_ms', '.2f'),
+    ("p90 (ms)", 'p90_ms', '.2f'),
+    ("p99 (ms)", 'p99_ms', '.2f'),
+    ("Max (ms)", 'max_ms', '.2f'),
+]
+
 DARK_STYLESHEET = f"""
 QMainWindow, QWidget {{
     background-color: {BG_DARK};
@@ -335,9 +350,14 @@ class MainWindow(QMainWindow):
 
         self.current_video_path = None
         self.analysis_thread = None
-        self.results_data = []
+        self.results = ResultStore()
+        self.count_store = CountStore()
+        self.d_stats = StreamingStats()
+        self.results_refit = False  # D refit since the analysis streamed its outputs
         self.batch_queue = []
         self.is_batch_mode = False
+        self.writer = None
+        self.profiler = None
 
         # Main Layout
         self.central_widget = QWidget()
@@ -453,11 +473,82 @@ class MainWindow(QMainWindow):
         self.spin_blur.setSingleStep(2) # Odd numbers only ideally
         layout.addRow("Blur Kernel Size:", self.spin_blur)
 
+        self.spin_r2 = QDoubleSpinBox()
+        self.spin_r2.setRange(0.0, 1.0)
+        self.spin_r2.setSingleStep(0.01)
+        self.spin_r2.setDecimals(2)
+        self.spin_r2.setValue(0.90)
+        self.spin_r2.setToolTip(
+            "Minimum R\u00b2 of the log-log fit for a frame to count as reliable. "
+            "Changing it after analysis re-evaluates all frames instantly.")
+        self.spin_r2.valueChanged.connect(self.refit_dimensions)
+        layout.addRow("R\u00b2 Threshold:", self.spin_r2)
+
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, os.cpu_count() or 1)
+        self.spin_workers.setValue(1)
+        self.spin_workers.setToolTip(
+            "Number of processes analyzing frames in parallel. "
+            "1 = analyze on the worker thread (no extra processes).")
+        layout.addRow("Worker Processes:", self.spin_workers)
+
+        self.spin_segments = QSpinBox()
+        self.spin_segments.setRange(1, os.cpu_count() or 1)
+        self.spin_segments.setValue(1)
+        self.spin_segments.setToolTip(
+            "Split the clip into this many segments, each decoded and analyzed "
+            "in its own process. Frame previews are not shown when > 1.")
+        layout.addRow("Decode Segments:", self.spin_segments)
+
+        self.check_frame_cache = QCheckBox()
+        self.check_frame_cache.setToolTip(
+            "Keep decoded grayscale frames in an on-disk cache so re-analyzing "
+            "this video (other methods, thresholds, clip ranges) skips decoding. "
+            "Frame previews are shown in grayscale.")
+        layout.addRow("Cache Decoded Frames:", self.check_frame_cache)
+
+        self.spin_cache_width = QSpinBox()
+        self.spin_cache_width.setRange(0, 7680)
+        self.spin_cache_width.setSingleStep(160)
+        self.spin_cache_width.setValue(0)
+        self.spin_cache_width.setSpecialValueText("Full")
+        self.spin_cache_width.setToolTip(
+            "Downscale cached frames to at most this width (Full = original resolution). "
+            "Analysis then runs on the downscaled frames.")
+        self.spin_cache_width.setEnabled(False)
+        self.check_frame_cache.toggled.connect(self.spin_cache_width.setEnabled)
+        layout.addRow("Cache Max Width:", self.spin_cache_width)
+
+        self.check_result_cache = QCheckBox()
+        self.check_result_cache.setToolTip(
+            "Save every frame's result to an on-disk cache. Re-running the same "
+            "video with the same settings reuses them, and a stopped or crashed "
+            "analysis resumes where it left off.")
+        layout.addRow("Cache Results / Resume:", self.check_result_cache)
+
+        self.spin_preview_rate = QSpinBox()
+        self.spin_preview_rate.setRange(0, 60)
+        self.spin_preview_rate.setValue(10)
+        self.spin_preview_rate.setSuffix(" Hz")
+        self.spin_preview_rate.setSpecialValueText("Off")
+        self.spin_preview_rate.setToolTip(
+            "Maximum rate at which the frame previews are refreshed during analysis. "
+            "Lower rates leave more time for analysis on slow machines.")
+        layout.addRow("Preview Rate:", self.spin_preview_rate)
+
+        self.check_profile = QCheckBox()
+        self.check_profile.setToolTip(
+            "Time each stage (decode, blur, Canny, box counting, fitting, drawing...) "
+            "and show per-stage percentiles in the Profile tab. Stages run by frame "
+            "workers or segment processes are not timed.")
+        layout.addRow("Profile Stages:", self.check_profile)
+
         self.combo_analysis = QComboBox()
         self.combo_analysis.addItems(["Moisy Threshold + Box Counting",
                                        "Edge + Box Counting",
                                        "Differential Box Counting (DBC)",
-                                       "Fourier Slope"])
+                                       "Fourier Slope",
+                                       "All Methods (Single Pass)"])
         self.combo_analysis.currentIndexChanged.connect(self.toggle_edge_settings)
         layout.addRow("Analysis Method:", self.combo_analysis)
 
@@ -509,6 +600,10 @@ class MainWindow(QMainWindow):
         self.spin_scale_end.setValue(8)
         self.spin_scale_end.setToolTip(self.spin_scale_start.toolTip())
 
+        # Refit D from the stored count pyramids when the range changes
+        self.spin_scale_start.valueChanged.connect(self.refit_dimensions)
+        self.spin_scale_end.valueChanged.connect(self.refit_dimensions)
+
         scale_range_layout.addWidget(QLabel("Start:"))
         scale_range_layout.addWidget(self.spin_scale_start)
         scale_range_layout.addWidget(QLabel("End:"))
@@ -520,7 +615,7 @@ class MainWindow(QMainWindow):
         self.toggle_edge_settings()
 
         # GPU / CPU status indicator
-        if GPU_AVAILABLE:
+        if gpu_available():
             self.lbl_compute = QLabel("Compute: GPU (CUDA)")
             self.lbl_compute.setStyleSheet(f"color: {SUCCESS_GREEN}; font-weight: bold;")
         else:
@@ -532,13 +627,15 @@ class MainWindow(QMainWindow):
 
     def toggle_edge_settings(self):
         method = self.combo_analysis.currentText()
-        is_edge = "Edge" in method
-        is_moisy = "Moisy" in method
+        is_all = "All Methods" in method
+        is_edge = "Edge" in method or is_all
+        is_moisy = "Moisy" in method or is_all
 
         # Edge-specific controls
         self.combo_method.setEnabled(is_edge)
         self.combo_threshold.setEnabled(is_edge)
         self.spin_blur.setEnabled(is_edge)
+        self.spin_r2.setEnabled(is_edge)
 
         # Moisy-specific controls
         self.slider_moisy_thresh.setVisible(is_moisy)
@@ -621,7 +718,11 @@ class MainWindow(QMainWindow):
         fig.canvas.draw()
 
     def _on_time_interact(self, event):
-        """Mark that the user has manually panned/zoomed the D(t) plot."""
+        """Mark that the user has manually panned/zoomed the D(t) plot.
+
+        The line itself is re-decimated for the new view by ``self.timeline``
+        whenever the x-limits change.
+        """
         if event.inaxes == self.ax_time:
             self._time_user_interacted = True
 
@@ -696,6 +797,8 @@ class MainWindow(QMainWindow):
         self.ax_time.set_ylim(0.5, 2.5)
         self.ax_time.set_xlim(0, 30)
         self.line_time, = self.ax_time.plot([], [], color=ACCENT, linewidth=1.5)
+        # Blit only the line, decimated to the visible window's pixel width
+        self.timeline = BlittedTimeline(self.canvas_time, self.ax_time, self.line_time)
         self._time_user_interacted = False
         self._time_window = 30  # seconds of visible window
         self.toolbar_time = NavigationToolbar(self.canvas_time, self)
@@ -731,10 +834,31 @@ class MainWindow(QMainWindow):
         self.ax_hist.set_xlabel("D")
         self.ax_hist.set_ylabel("Count")
         self._style_figure(self.fig_hist, self.ax_hist)
+        # Bars are created once; update_stats only changes their heights
+        edges, counts = self.d_stats.display_histogram()
+        self.hist_bars = self.ax_hist.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+                                          color=ACCENT, edgecolor=BG_DARK, alpha=0.85)
+        self.ax_hist.axvline(1.3, color=ERROR_RED, linestyle='--', label='Optimal Low (1.3)')
+        self.ax_hist.axvline(1.5, color=ERROR_RED, linestyle='--', label='Optimal High (1.5)')
+        self.ax_hist.legend(facecolor=BG_SURFACE, edgecolor=BORDER, labelcolor=TEXT_PRIMARY)
+        self.ax_hist.set_xlim(0.5, 2.5)
         summary_layout.addWidget(self.canvas_hist)
 
         self.tabs.addTab(self.tab_summary, "Summary & Statistics")
 
+        # --- Tab 3: Profile ---
+        self.tab_profile = QWidget()
+        profile_layout = QVBoxLayout(self.tab_profile)
+        self.profile_table = QTableWidget()
+        self.profile_table.setColumnCount(len(PROFILE_COLUMNS) + 1)
+        self.profile_table.setHorizontalHeaderLabels(["Stage"] + [label for label, _, _ in PROFILE_COLUMNS])
+        self.profile_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.profile_table.setAlternatingRowColors(True)
+        profile_layout.addWidget(self.profile_table)
+        self.tabs.addTab(self.tab_profile, "Profile")
+        # Percentiles are computed over every call, so refresh only when shown
+        self.tabs.currentChanged.connect(self._on_tab_changed)
+
     def load_video(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open Video", "", "Video Files (*.mp4 *.avi *.mov *.mkv)")
         if path:
@@ -742,7 +866,8 @@ class MainWindow(QMainWindow):
             self.lbl_file.setText(os.path.basename(path))
             self.btn_start.setEnabled(True)
             self.btn_batch.setEnabled(True)
-            self.results_data = []
+            self.results.clear()
+            self.count_store.clear()
 
             # Set clip range from video duration
             _cap = cv2.VideoCapture(path)
@@ -755,15 +880,11 @@ class MainWindow(QMainWindow):
                 self.time_clip_end.setTime(QTime(_dur // 3600, (_dur % 3600) // 60, _dur % 60))
 
             # Clear plots
-            self.ax_hist.clear()
-            self.ax_hist.set_title("Distribution of D values")
-            self.ax_hist.set_xlabel("D")
-            self.ax_hist.set_ylabel("Count")
-            self._style_figure(self.fig_hist, self.ax_hist)
-            self.canvas_hist.draw()
+            self.d_stats.reset()
+            self.update_stats()
 
             # Reset D(t) and log-log lines
-            self.line_time.set_data([], [])
+            self.timeline.set_data(np.empty(0), np.empty(0))
             self.ax_time.set_xlim(0, self._time_window)
             self.ax_time.set_ylim(0.5, 2.5)
             self._time_user_interacted = False
@@ -787,6 +908,7 @@ class MainWindow(QMainWindow):
             "Differential Box Counting (DBC)": "dbc",
             "Fourier Slope": "fourier"
         }
+        all_methods = ["moisy_boxcount", "box_counting", "dbc", "fourier"]
 
         settings = {
             'sampling_rate': self.spin_sampling.value(),
@@ -796,13 +918,37 @@ class MainWindow(QMainWindow):
             'analysis_type': analysis_map.get(self.combo_analysis.currentText(), 'moisy_boxcount'),
             'moisy_threshold': self.spin_moisy_thresh.value(),
             'scale_range': (self.spin_scale_start.value(), self.spin_scale_end.value()),
+            'r2_threshold': self.spin_r2.value(),
+            # Single pass: decode once, run every method, method-prefixed columns
+            'analysis_types': all_methods if "All Methods" in self.combo_analysis.currentText() else None,
             'clip_start_sec': self._qtime_to_sec(self.time_clip_start.time()),
             'clip_end_sec': self._qtime_to_sec(self.time_clip_end.time()),
+            'frame_workers': self.spin_workers.value(),
+            'segments': self.spin_segments.value(),
+            'frame_cache': self.check_frame_cache.isChecked(),
+            'frame_cache_max_width': self.spin_cache_width.value() or None,
+            'result_cache': self.check_result_cache.isChecked(),
+            # Previews are downscaled to the label size in the worker thread
+            'preview_size': (self.lbl_frame.width(), self.lbl_frame.height()),
+            'preview_max_fps': self.spin_preview_rate.value(),
         }
 
+        if self.check_profile.isChecked():
+            self.profiler = profiling.enable()
+        else:
+            profiling.disable()
+            self.profiler = None
+
+        # Batch mode streams results to disk as they arrive
+        self.writer = None
+        if self.is_batch_mode:
+            paths = batch_output_paths(self.current_video_path)
+            self.writer = StreamingResultWriter(paths['csv'], paths['columns'])
+
         self.analysis_thread = AnalysisThread(self.current_video_path, settings)
         self.analysis_thread.progress_updated.connect(self.update_progress)
-        self.analysis_thread.frame_processed.connect(self.update_plots)
+        self.analysis_thread.results_ready.connect(self.add_results)
+        self.analysis_thread.preview_ready.connect(self.update_previews)
         self.analysis_thread.analysis_finished.connect(self.analysis_finished)
 
         self.analysis_thread.start()
@@ -810,7 +956,10 @@ class MainWindow(QMainWindow):
         self.btn_stop.setEnabled(True)
         self.btn_load.setEnabled(False)
         self.btn_batch.setEnabled(False)
-        self.results_data = []
+        self.results.clear()
+        self.count_store.clear()
+        self.d_stats.reset()
+        self.results_refit = False
         self._time_user_interacted = False
 
     def stop_analysis(self):
@@ -821,129 +970,195 @@ class MainWindow(QMainWindow):
         self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(current)
 
+    def update_previews(self, frame_image, edges_image):
+        # Images arrive already downscaled (and rate-limited) by the worker
+        if frame_image is not None:
+            self.lbl_frame.setPixmap(QPixmap.fromImage(frame_image).scaled(self.lbl_frame.size(), Qt.KeepAspectRatio))
+        if edges_image is not None:
+            self.lbl_edges.setPixmap(QPixmap.fromImage(edges_image).scaled(self.lbl_edges.size(), Qt.KeepAspectRatio))
+
     def update_plots(self, result):
-        # Store only numeric data (not images) to prevent memory leak
-        frame = result.pop('frame', None)
-        edges = result.pop('edges', None)
-        result.pop('df', None)  # local slopes array (not needed in CSV)
-        self.results_data.append(result)
+        self.add_results([result])
+
+    def add_results(self, results):
+        """Store a batch of results from ``AnalysisThread.results_ready`` and redraw once."""
+        n_before = len(self.results)
+        for result in results:
+            # Store only numeric data (previews come through update_previews)
+            result.pop('df', None)  # local slopes array (not needed in CSV)
+            self.results.append(result)
+            self.count_store.append_result(result)
+            self.d_stats.add(result['D'])
+        if self.writer is not None:
+            self.writer.write(results)
+        n_results = len(self.results)
+        if n_results == n_before:
+            return
+        result = results[-1]
 
         # Throttle plot updates — only redraw plots every 3 frames
-        should_redraw_plots = len(self.results_data) % 3 == 0 or len(self.results_data) == 1
+        should_redraw_plots = n_results // 3 != n_before // 3 or n_before == 0
 
         if should_redraw_plots:
-            # Update D(t) plot
-            timestamps = [r['timestamp'] for r in self.results_data]
-            Ds = [r['D'] for r in self.results_data]
-
-            self.line_time.set_data(timestamps, Ds)
-            # Auto-scroll sliding window unless user has manually panned/zoomed
-            if not self._time_user_interacted:
-                t_now = timestamps[-1]
-                if t_now > self._time_window:
-                    self.ax_time.set_xlim(t_now - self._time_window, t_now + 2)
-                else:
-                    self.ax_time.set_xlim(0, self._time_window)
-            self.canvas_time.draw()
+            with profiling.stage('draw plots'):
+                self._redraw_plots(result)
 
-            # Update Log-Log plot
-            scales = result['scales']
-            counts = result['counts']
-            method = result.get('method', 'box_counting')
-            # Check if arrays are not empty. Use len() as they might be numpy arrays.
-            if len(scales) > 0 and len(counts) > 0:
-                self.ax_log.clear()
-                self._style_figure(self.fig_log, self.ax_log)
-
-                if method == 'moisy_boxcount':
-                    # Moisy: log(R) vs log(N), highlight selected scale range
-                    self.ax_log.plot(scales, counts, 'o-', color=ERROR_RED, markersize=4)
-
-                    # Highlight the scale-range points used for D
-                    sr = result.get('scale_range', '4-8')
-                    parts = sr.split('-')
-                    lo = int(parts[0]) - 1   # MATLAB→Python
-                    hi = int(parts[1])
-                    # The scale/count arrays have length p+1; indices lo..hi-1 in
-                    # the df array correspond to the *intervals* between adjacent
-                    # (scale, count) points.  Highlight points lo..hi (inclusive).
-                    lo_pt = max(0, lo)
-                    hi_pt = min(len(scales), hi + 1)
-                    self.ax_log.plot(scales[lo_pt:hi_pt], counts[lo_pt:hi_pt],
-                                    's', color=ACCENT, markersize=8, zorder=5,
-                                    label=f"Scales {parts[0]}\u2013{parts[1]}")
-
-                    D = result['D']
-                    D_std = result.get('D_std', 0)
-                    title_text = f"Log-Log  D = {D:.4f} \u00b1 {D_std:.4f}"
+        # Update Statistics & Histogram (every 10 frames)
+        if n_results // 10 != n_before // 10:
+            with profiling.stage('update stats'):
+                self.update_stats()
+
+    def _redraw_plots(self, result):
+        """Redraw the D(t) line and the log-log plot of *result*."""
+        # Update D(t) plot (column views, no per-row lists)
+        timestamps = self.results['timestamp']
+        Ds = self.results['D']
+
+        self.timeline.set_data(timestamps, Ds)
+        # Auto-scroll sliding window unless user has manually panned/zoomed.
+        # Sliding changes the axes, so the whole figure is redrawn; until the
+        # window fills up only the line is blitted.
+        t_now = timestamps[-1]
+        if not self._time_user_interacted and t_now > self._time_window:
+            self.ax_time.set_xlim(t_now - self._time_window, t_now + 2)
+            self.canvas_time.draw()
+        else:
+            self.timeline.redraw()
+
+        # Update Log-Log plot
+        scales = result['scales']
+        counts = result['counts']
+        method = result.get('method', 'box_counting')
+        # Check if arrays are not empty. Use len() as they might be numpy arrays.
+        if len(scales) > 0 and len(counts) > 0:
+            self.ax_log.clear()
+            self._style_figure(self.fig_log, self.ax_log)
+
+            if method == 'moisy_boxcount':
+                # Moisy: log(R) vs log(N), highlight selected scale range
+                self.ax_log.plot(scales, counts, 'o-', color=ERROR_RED, markersize=4)
+
+                # Highlight the scale-range points used for D
+                sr = result.get('scale_range', '4-8')
+                parts = sr.split('-')
+                lo = int(parts[0]) - 1   # MATLAB→Python
+                hi = int(parts[1])
+                # The scale/count arrays have length p+1; indices lo..hi-1 in
+                # the df array correspond to the *intervals* between adjacent
+                # (scale, count) points.  Highlight points lo..hi (inclusive).
+                lo_pt = max(0, lo)
+                hi_pt = min(len(scales), hi + 1)
+                self.ax_log.plot(scales[lo_pt:hi_pt], counts[lo_pt:hi_pt],
+                                's', color=ACCENT, markersize=8, zorder=5,
+                                label=f"Scales {parts[0]}\u2013{parts[1]}")
+
+                D = result['D']
+                D_std = result.get('D_std', 0)
+                title_text = f"Log-Log  D = {D:.4f} \u00b1 {D_std:.4f}"
+                self.ax_log.set_title(title_text, color=TEXT_PRIMARY)
+                self.ax_log.set_xlabel("log(R)")
+                self.ax_log.set_ylabel("log(N)")
+                self.ax_log.legend(facecolor=BG_SURFACE, edgecolor=BORDER,
+                                   labelcolor=TEXT_PRIMARY, fontsize='small')
+            else:
+                self.ax_log.plot(scales, counts, 'o-', color=ERROR_RED, markersize=4)
+                reliability = "" if result.get('reliable', True) else " [UNRELIABLE]"
+                title_text = f"Log-Log (D={result['D']:.2f}, R\u00b2={result['R2']:.2f})"
+                if reliability:
+                    self.ax_log.set_title(title_text + reliability, color=ERROR_RED)
+                else:
                     self.ax_log.set_title(title_text, color=TEXT_PRIMARY)
-                    self.ax_log.set_xlabel("log(R)")
-                    self.ax_log.set_ylabel("log(N)")
-                    self.ax_log.legend(facecolor=BG_SURFACE, edgecolor=BORDER,
-                                       labelcolor=TEXT_PRIMARY, fontsize='small')
+
+                if method == 'fourier':
+                    self.ax_log.set_xlabel("log(Frequency)")
+                    self.ax_log.set_ylabel("log(Power)")
                 else:
-                    self.ax_log.plot(scales, counts, 'o-', color=ERROR_RED, markersize=4)
-                    reliability = "" if result.get('reliable', True) else " [UNRELIABLE]"
-                    title_text = f"Log-Log (D={result['D']:.2f}, R\u00b2={result['R2']:.2f})"
-                    if reliability:
-                        self.ax_log.set_title(title_text + reliability, color=ERROR_RED)
-                    else:
-                        self.ax_log.set_title(title_text, color=TEXT_PRIMARY)
-
-                    if method == 'fourier':
-                        self.ax_log.set_xlabel("log(Frequency)")
-                        self.ax_log.set_ylabel("log(Power)")
-                    else:
-                        self.ax_log.set_xlabel("log(1/s)")
-                        self.ax_log.set_ylabel("log(N(s))")
-
-                self.canvas_log.draw()
-
-        # Always update preview images (lightweight)
-
-        if frame is not None:
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.lbl_frame.setPixmap(QPixmap.fromImage(qt_image).scaled(self.lbl_frame.size(), Qt.KeepAspectRatio))
-
-        if edges is not None:
-            edges = np.ascontiguousarray(edges)
-            h, w = edges.shape
-            bytes_per_line = w
-            qt_image = QImage(edges.data, w, h, bytes_per_line, QImage.Format_Grayscale8)
-            self.lbl_edges.setPixmap(QPixmap.fromImage(qt_image).scaled(self.lbl_edges.size(), Qt.KeepAspectRatio))
+                    self.ax_log.set_xlabel("log(1/s)")
+                    self.ax_log.set_ylabel("log(N(s))")
 
-        # Update Statistics & Histogram (every 10 frames)
-        if len(self.results_data) % 10 == 0:
-            Ds = [r['D'] for r in self.results_data]
-            self.update_stats(Ds)
+            self.canvas_log.draw()
 
-    def update_stats(self, Ds):
-        if not Ds:
+    def refit_dimensions(self):
+        """Recompute D for all analyzed frames after a fit parameter changed.
+
+        Uses the stored log-log count pyramids, so no frame is decoded or
+        counted again.  In a multi-method pass the method-prefixed columns
+        are refit as well.
+        """
+        if not len(self.results) or len(self.count_store) != len(self.results):
+            return
+        if self.analysis_thread is not None and self.analysis_thread.isRunning():
             return
 
-        # Histogram
-        self.ax_hist.clear()
-        self.ax_hist.hist(Ds, bins=20, color=ACCENT, edgecolor=BG_DARK, alpha=0.85)
-        self.ax_hist.axvline(1.3, color=ERROR_RED, linestyle='--', label='Optimal Low (1.3)')
-        self.ax_hist.axvline(1.5, color=ERROR_RED, linestyle='--', label='Optimal High (1.5)')
-        self.ax_hist.set_title("Distribution of D values")
-        self.ax_hist.legend(facecolor=BG_SURFACE, edgecolor=BORDER, labelcolor=TEXT_PRIMARY)
-        self._style_figure(self.fig_hist, self.ax_hist)
-        self.canvas_hist.draw()
+        primary = self.results['method'][0]
+        refit = self._refit_method(primary, self.count_store, '')
+        if 'methods' in self.results:
+            for method in str(self.results['methods'][0]).split('+'):
+                counts = self.count_store if method == primary else self._method_counts(method)
+                refit = self._refit_method(method, counts, f"{method}_") or refit
+        if not refit:
+            return
+        self.results_refit = True
+
+        Ds = self.results['D']
+        self.timeline.set_data(self.results['timestamp'], Ds)
+        self.timeline.redraw()
+        self.d_stats.reset()
+        self.d_stats.extend(Ds)
+        self.update_stats()
+
+    def _method_counts(self, method):
+        """CountStore of the ``<method>_scales``/``<method>_counts`` columns."""
+        counts = CountStore(capacity=len(self.results))
+        for frame_idx, timestamp, log_scales, log_counts in zip(
+                self.results['frame_idx'], self.results['timestamp'],
+                self.results[f"{method}_scales"], self.results[f"{method}_counts"]):
+            counts.append(frame_idx, timestamp,
+                          log_scales if log_scales is not None else [],
+                          log_counts if log_counts is not None else [])
+        return counts
+
+    def _refit_method(self, method, counts, prefix):
+        """Refit the *prefix*-ed columns of *method* from *counts*; False if it has no fit parameter."""
+        if method == 'moisy_boxcount':
+            scale_range = (self.spin_scale_start.value(), self.spin_scale_end.value())
+            D, D_std = counts.moisy_dimension(scale_range)
+            self.results[f"{prefix}D"][:] = D
+            self.results[f"{prefix}D_std"][:] = D_std
+            self.results[f"{prefix}scale_range"][:] = f"{scale_range[0]}-{scale_range[1]}"
+        elif method == 'box_counting':
+            # D itself does not depend on the threshold, only reliability does
+            _, _, reliable = counts.regression(self.spin_r2.value())
+            self.results[f"{prefix}reliable"][:] = reliable
+        else:
+            return False
+        return True
+
+    def update_stats(self):
+        """Refresh the histogram bars and stats table from the streaming accumulator."""
+        acc = self.d_stats
+
+        # Histogram: fixed bins, only the bar heights change
+        _, counts = acc.display_histogram()
+        for bar, height in zip(self.hist_bars, counts):
+            bar.set_height(height)
+        if acc.count:
+            self.ax_hist.set_xlim(min(acc.min, 1.3) - 0.05, max(acc.max, 1.5) + 0.05)
+            self.ax_hist.set_ylim(0, max(counts.max(), 1) * 1.05)
+        self.canvas_hist.draw_idle()
+
+        if not acc.count:
+            self.stats_table.setRowCount(0)
+            return
 
         # Stats Table
-        s = pd.Series(Ds)
         stats = {
-            "Mean D": f"{s.mean():.4f}",
-            "Median D": f"{s.median():.4f}",
-            "Std Dev": f"{s.std():.4f}",
-            "Min D": f"{s.min():.4f}",
-            "Max D": f"{s.max():.4f}",
-            "% in 1.3-1.5": f"{((s >= 1.3) & (s <= 1.5)).mean() * 100:.1f}%"
+            "Mean D": f"{acc.mean:.4f}",
+            "Median D": f"{acc.median:.4f}",
+            "Std Dev": f"{acc.std:.4f}",
+            "Min D": f"{acc.min:.4f}",
+            "Max D": f"{acc.max:.4f}",
+            "% in 1.3-1.5": f"{acc.percent_optimal:.1f}%"
         }
 
         self.stats_table.setRowCount(len(stats))
@@ -984,43 +1199,49 @@ class MainWindow(QMainWindow):
         # Start analysis for this file
         self.start_analysis()
 
+    def _on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.tab_profile:
+            self.update_profile()
+
+    def update_profile(self):
+        """Fill the Profile tab from the current profiler's report."""
+        report = self.profiler.report() if self.profiler is not None else {}
+        self.profile_table.setRowCount(len(report))
+        for row, (name, stats) in enumerate(report.items()):
+            self.profile_table.setItem(row, 0, QTableWidgetItem(name))
+            for col, (_, key, fmt) in enumerate(PROFILE_COLUMNS, start=1):
+                self.profile_table.setItem(row, col, QTableWidgetItem(format(stats[key], fmt)))
+
     def analysis_finished(self):
+        self.update_stats()
+        self.update_profile()
         # Auto-export if in batch mode
-        if self.is_batch_mode and self.current_video_path and self.results_data:
-            # Generate filename
+        if self.is_batch_mode and self.current_video_path and len(self.results):
+            # Generate filenames next to the video
             base = os.path.splitext(os.path.basename(self.current_video_path))[0]
-            folder = os.path.dirname(self.current_video_path)
-            csv_path = os.path.join(folder, f"fractal_analysis_{base}.csv")
+            paths = batch_output_paths(self.current_video_path)
 
             try:
-                df = pd.DataFrame(self.results_data)
-                df.to_csv(csv_path, index=False)
+                self.writer.close()
+                if self.results_refit:
+                    # The streamed files hold the D values from before the refit
+                    rewriter = StreamingResultWriter(paths['csv'], paths['columns'])
+                    rewriter.write([self.results.row(i) for i in range(len(self.results))])
+                    rewriter.close()
+                save_results_binary(self.results, paths['binary'])
                 # Save publication-quality plots (full timeline for D(t))
-                self._save_timeseries_full(os.path.join(folder, f"fractal_timeseries_{base}.png"))
-                self._save_fig_publication(self.fig_log, os.path.join(folder, f"fractal_loglog_{base}.png"))
+                self._save_timeseries_full(paths['timeseries'])
+                self._save_fig_publication(self.fig_log, paths['loglog'])
 
                 # Save JSON Summary
-                json_path = os.path.join(folder, f"fractal_summary_{base}.json")
-                s = df['D']
-                summary = {
-                    "mean_D": float(s.mean()),
-                    "median_D": float(s.median()),
-                    "std_D": float(s.std()),
-                    "min_D": float(s.min()),
-                    "max_D": float(s.max()),
-                    "percent_optimal": float(((s >= 1.3) & (s <= 1.5)).mean() * 100),
-                    "total_frames": len(s),
-                    "video_path": self.current_video_path
-                }
-                # Add Moisy-specific summary fields if applicable
-                if 'D_std' in df.columns:
-                    summary["mean_D_std"] = float(df['D_std'].mean())
-                    summary["threshold"] = float(df['threshold'].iloc[0])
-                    summary["padded_size"] = int(df['padded_size'].iloc[0])
-                    summary["scale_range"] = str(df['scale_range'].iloc[0])
-
-                with open(json_path, 'w') as f:
-                    json.dump(summary, f, indent=4)
+                if self.results_refit:
+                    summary = summarize_results(self.results, self.current_video_path,
+                                                stats=self.d_stats)
+                else:
+                    summary = self.writer.summary(self.current_video_path)
+                save_summary_json(summary, paths['json'])
+                if self.profiler is not None:
+                    save_summary_json(self.profiler.report(), paths['profile'])
 
             except Exception as e:
                 print(f"Error saving batch results for {base}: {e}")
@@ -1037,31 +1258,31 @@ class MainWindow(QMainWindow):
 
     def _save_timeseries_full(self, path):
         """Save the D(t) plot showing the complete timeline, regardless of current pan/zoom."""
-        if not self.results_data:
+        with self.timeline.static():
+            if not len(self.results):
+                self._save_fig_publication(self.fig_time, path)
+                return
+            timestamps = self.results['timestamp']
+            orig_xlim = self.ax_time.get_xlim()
+            t_min, t_max = timestamps.min(), timestamps.max()
+            margin = max((t_max - t_min) * 0.02, 1)
+            self.ax_time.set_xlim(t_min - margin, t_max + margin)
             self._save_fig_publication(self.fig_time, path)
-            return
-        timestamps = [r['timestamp'] for r in self.results_data]
-        orig_xlim = self.ax_time.get_xlim()
-        t_min, t_max = min(timestamps), max(timestamps)
-        margin = max((t_max - t_min) * 0.02, 1)
-        self.ax_time.set_xlim(t_min - margin, t_max + margin)
-        self._save_fig_publication(self.fig_time, path)
-        self.ax_time.set_xlim(orig_xlim)
-        self.canvas_time.draw()
+            self.ax_time.set_xlim(orig_xlim)
 
     def export_results(self):
-        if not self.results_data:
+        if not len(self.results):
             return
 
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
         if path:
-            df = pd.DataFrame(self.results_data)
-            df.to_csv(path, index=False)
+            save_results_to_csv(self.results, path)
+            save_results_binary(self.results, path)
             # Save publication-quality plots alongside CSV
             base = os.path.splitext(path)[0]
             self._save_timeseries_full(f"{base}_timeseries.png")
             self._save_fig_publication(self.fig_log, f"{base}_loglog.png")
-            if len(self.results_data) >= 5:
+            if len(self.results) >= 5:
                 self._save_fig_publication(self.fig_hist, f"{base}_histogram.png")
 
 def _set_title_bar_color(window, color_hex):
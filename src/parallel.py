@@ -0,0 +1,278 @@
+"""Process-parallel analysis of a single video.
+
+Frame-parallel mode keeps one decoder in the calling process and hands the
+decoded frames to a pool of worker processes through a ring of shared-memory
+slots.  Results are re-ordered by ``frame_idx`` before they are delivered, so
+callers see exactly the same sequence as the serial loop.
+
+Segment-parallel mode splits the clip range into contiguous segments, each
+decoded by its own ``cv2.VideoCapture`` (seeked with ``CAP_PROP_POS_FRAMES``)
+in its own process, so decoding is spread across cores as well.
+"""
+import multiprocessing
+import os
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src import profiling
+from src.seeking import FrameSkipper
+
+# Per-process state of frame-parallel workers (set by _init_frame_worker)
+_worker = {}
+
+
+def _init_frame_worker(shm_name, frame_shape, frame_dtype, settings):
+    import cv2
+    from src.pipeline import analyzer_from_settings
+    cv2.setNumThreads(1)
+    _worker['shm'] = shared_memory.SharedMemory(name=shm_name)
+    _worker['shape'] = frame_shape
+    _worker['dtype'] = np.dtype(frame_dtype)
+    _worker['settings'] = settings
+    _worker['analyzer'] = analyzer_from_settings(settings)
+
+
+def _analyze_slot(slot, frame_idx, fps):
+    from src.pipeline import analyze_frame
+    shape, dtype = _worker['shape'], _worker['dtype']
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    frame = np.ndarray(shape, dtype=dtype, buffer=_worker['shm'].buf, offset=slot * nbytes)
+    result = analyze_frame(_worker['analyzer'], frame, frame_idx, fps, _worker['settings'])
+    # The decoder still holds the original frame; don't ship it back
+    result.pop('frame', None)
+    return result
+
+
+def default_worker_count():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def analyze_frames_parallel(cap, settings, fps, start_frame, end_frame, on_result,
+                            on_progress=None, is_running=None, workers=None,
+                            sample_origin=None):
+    """Decode frames from *cap* and analyze them on *workers* processes.
+
+    Mirrors the serial loop in :func:`src.pipeline.analyze_range`: *on_result*
+    receives results in ``frame_idx`` order, including the decoded ``frame``.
+    """
+    workers = workers or default_worker_count()
+    sampling_rate = settings.get('sampling_rate', 1)
+    if sample_origin is None:
+        sample_origin = start_frame
+    clip_total = end_frame - start_frame
+    n_slots = 2 * workers
+
+    shm = None
+    pool = None
+    pending = deque()  # (frame_idx, frame, future) in submission order
+    slot_view = None
+    submitted = 0
+
+    def emit_oldest():
+        frame_idx, frame, future = pending.popleft()
+        try:
+            result = future.result()
+            result['frame'] = frame
+            on_result(result)
+        except Exception as e:
+            print(f"Error processing frame {frame_idx}: {e}")
+
+    try:
+        skipper = FrameSkipper(cap, settings.get('skip_mode', 'auto'))
+        frame_idx = start_frame
+        while is_running is None or is_running():
+            # Next sampled frame at or after frame_idx
+            target = frame_idx + (sample_origin - frame_idx) % sampling_rate
+            if target >= end_frame:
+                if on_progress is not None and clip_total > 0:
+                    on_progress(clip_total - 1, clip_total)
+                break
+            with profiling.stage('skip'):
+                if not skipper.skip(frame_idx, target):
+                    break
+            frame_idx = target
+            with profiling.stage('decode'):
+                ret, frame = cap.read()
+            if not ret:
+                break
+
+            if pool is None:
+                # Size the shared ring from the first decoded frame
+                shm = shared_memory.SharedMemory(create=True, size=frame.nbytes * n_slots)
+                slot_view = np.ndarray((n_slots,) + frame.shape, dtype=frame.dtype,
+                                       buffer=shm.buf)
+                pool = ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_frame_worker,
+                    initargs=(shm.name, frame.shape, frame.dtype.str, settings))
+
+            # The ring is FIFO: wait for the slot's previous frame to be emitted
+            if len(pending) == n_slots:
+                emit_oldest()
+
+            slot = submitted % n_slots
+            slot_view[slot] = frame
+            pending.append((frame_idx, frame,
+                            pool.submit(_analyze_slot, slot, frame_idx, fps)))
+            submitted += 1
+
+            # Deliver anything that has already finished, in order
+            while pending and pending[0][2].done():
+                emit_oldest()
+
+            if on_progress is not None:
+                on_progress(frame_idx - start_frame, clip_total)
+            frame_idx += 1
+
+        if is_running is None or is_running():
+            while pending:
+                emit_oldest()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        slot_view = None
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+# ----------------------------------------------------------------------
+# Segment-parallel decoding
+# ----------------------------------------------------------------------
+
+# Segment workers report decode progress every this many frames
+_SEGMENT_PROGRESS_EVERY = 25
+
+
+def split_frame_range(start_frame, end_frame, segments):
+    """Split [start_frame, end_frame) into up to *segments* contiguous ranges."""
+    total = end_frame - start_frame
+    segments = max(1, min(segments, total))
+    bounds = []
+    for k in range(segments):
+        lo = start_frame + (total * k) // segments
+        hi = start_frame + (total * (k + 1)) // segments
+        if hi > lo:
+            bounds.append((lo, hi))
+    return bounds
+
+
+def _analyze_segment(video_path, settings, seg, seg_start, seg_end, sample_origin,
+                     messages, stop_event):
+    """Worker process: decode and analyze one segment, streaming results back."""
+    import cv2
+    from src.cache import open_capture
+    from src.pipeline import analyze_range, analyzer_from_settings
+    cv2.setNumThreads(1)
+
+    def send_result(result):
+        # Preview images stay in the worker; only numeric results cross over
+        result.pop('frame', None)
+        result.pop('edges', None)
+        messages.put(('result', seg, result))
+
+    reported = [0]
+
+    def send_progress(current, total):
+        # Sparse sampling skips frames, so progress arrives in strides
+        decoded = current + 1
+        if decoded - reported[0] >= _SEGMENT_PROGRESS_EVERY or decoded == total:
+            reported[0] = decoded
+            messages.put(('progress', seg, decoded))
+
+    try:
+        cap = open_capture(video_path, settings)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if seg_start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, seg_start)
+        analyze_range(cap, analyzer_from_settings(settings), settings, fps, seg_start, seg_end,
+                      send_result, send_progress, lambda: not stop_event.is_set(),
+                      sample_origin=sample_origin)
+        cap.release()
+    except Exception as e:
+        messages.put(('error', seg, f"{type(e).__name__}: {e}"))
+    messages.put(('done', seg, None))
+
+
+def analyze_segments_parallel(video_path, settings, fps, start_frame, end_frame, on_result,
+                              on_progress=None, is_running=None, segments=None,
+                              sample_origin=None):
+    """Analyze [start_frame, end_frame) of *video_path* as independent segments.
+
+    Every segment is decoded and analyzed in its own process.  Results are
+    merged into one timeline: *on_result* receives them in ``frame_idx``
+    order, without the ``frame`` and ``edges`` preview images.
+    """
+    segments = segments or default_worker_count()
+    if sample_origin is None:
+        sample_origin = start_frame
+    bounds = split_frame_range(start_frame, end_frame, segments)
+    clip_total = end_frame - start_frame
+
+    ctx = multiprocessing.get_context()
+    messages = ctx.Queue()
+    stop_event = ctx.Event()
+    procs = [ctx.Process(target=_analyze_segment,
+                         args=(video_path, settings, seg, lo, hi, sample_origin,
+                               messages, stop_event),
+                         daemon=True)
+             for seg, (lo, hi) in enumerate(bounds)]
+    for p in procs:
+        p.start()
+
+    buffers = [[] for _ in bounds]  # results of segments not yet due
+    done = [False] * len(bounds)
+    decoded = [0] * len(bounds)
+    next_seg = 0  # segment whose results are delivered live
+
+    try:
+        while not all(done):
+            if is_running is not None and not is_running():
+                stop_event.set()
+                break
+            try:
+                kind, seg, payload = messages.get(timeout=0.1)
+            except queue.Empty:
+                # A worker that died without saying goodbye is finished too
+                for k, p in enumerate(procs):
+                    if not done[k] and not p.is_alive() and p.exitcode not in (0, None):
+                        print(f"Error: segment {k} worker exited with code {p.exitcode}")
+                        done[k] = True
+                continue
+
+            if kind == 'result':
+                if seg == next_seg:
+                    on_result(payload)
+                else:
+                    buffers[seg].append(payload)
+            elif kind == 'progress':
+                decoded[seg] = payload
+                if on_progress is not None:
+                    on_progress(sum(decoded) - 1, clip_total)
+            elif kind == 'error':
+                print(f"Error in segment {seg} of {video_path}: {payload}")
+            elif kind == 'done':
+                done[seg] = True
+
+            # Earlier segments finished: release buffered results in order
+            while next_seg < len(bounds) and done[next_seg]:
+                next_seg += 1
+                if next_seg < len(bounds):
+                    for result in buffers[next_seg]:
+                        on_result(result)
+                    buffers[next_seg] = []
+    finally:
+        stop_event.set()
+        # Drain so workers blocked on a full queue can exit
+        while any(p.is_alive() for p in procs):
+            try:
+                messages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for p in procs:
+            p.join()
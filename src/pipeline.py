@@ -0,0 +1,403 @@
+import math
+import sqlite3
+
+import cv2
+import numpy as np
+from src import profiling
+from src.cache import open_capture
+from src.core import FractalAnalyzer
+from src.seeking import FrameSkipper
+
+
+def analyzer_from_settings(settings):
+    """FractalAnalyzer configured for *settings* (``settings['engine']``, default 'pyramid')."""
+    return FractalAnalyzer(engine=settings.get('engine', 'pyramid'))
+
+
+def clip_frame_range(total_frames, fps, settings):
+    """Convert the clip range in *settings* (seconds) to [start_frame, end_frame)."""
+    clip_start_sec = settings.get('clip_start_sec', 0)
+    clip_end_sec = settings.get('clip_end_sec', 0)
+
+    start_frame = int(clip_start_sec * fps) if fps > 0 else 0
+    start_frame = max(0, min(start_frame, total_frames - 1))
+
+    if clip_end_sec > 0:
+        end_frame = int(clip_end_sec * fps) if fps > 0 else total_frames
+        end_frame = max(start_frame + 1, min(end_frame, total_frames))
+    else:
+        end_frame = total_frames  # 00:00:00 end = full video
+
+    return start_frame, end_frame
+
+
+def _edge_settings(settings):
+    """preprocess_frame arguments (method, threshold mode, thresholds, blur) from *settings*."""
+    method = settings.get('edge_method', 'canny')
+    threshold_mode = settings.get('threshold_mode', 'auto')
+    manual_thresholds = settings.get('manual_thresholds', (100, 200))
+    blur_kernel_size = settings.get('blur_kernel_size', 5)
+    blur_kernel = (blur_kernel_size, blur_kernel_size) if blur_kernel_size > 0 else None
+    return method, threshold_mode, manual_thresholds, blur_kernel
+
+
+def _make_result(frame_idx, fps, analysis_type, D, R2, reliable, log_scales, log_counts,
+                 frame, edges):
+    return {
+        'frame_idx': frame_idx,
+        'timestamp': frame_idx / fps if fps > 0 else 0,
+        'D': D,
+        'R2': R2,
+        'reliable': reliable,
+        'scales': log_scales,
+        'counts': log_counts,
+        'edge_pixels': cv2.countNonZero(edges) if (edges is not None and analysis_type == 'box_counting') else 0,
+        'frame': frame,
+        'edges': edges,
+        'method': analysis_type
+    }
+
+
+# Fields of a method's output that go into a result row (prefixed by the
+# method name when several methods run in one pass)
+_METHOD_FIELDS = ('D', 'R2', 'reliable', 'scales', 'counts', 'edge_pixels')
+_MOISY_FIELDS = ('D_std', 'threshold', 'padded_size', 'scale_range')
+
+
+def analysis_methods(settings):
+    """Methods to run per frame: ``settings['analysis_types']`` or the single ``analysis_type``."""
+    return list(settings.get('analysis_types') or [settings.get('analysis_type', 'box_counting')])
+
+
+def _analyze_method(analyzer, analysis_type, gray, settings):
+    """Run one analysis method on a grayscale frame; returns a dict of its outputs."""
+    D = 0.0
+    R2 = 0.0
+    log_scales = []
+    log_counts = []
+    edges = None
+    reliable = True
+    out = {}
+
+    if analysis_type == 'moisy_boxcount':
+        moisy_thresh = settings.get('moisy_threshold', 0.25)
+        scale_range = settings.get('scale_range', (4, 8))
+        D, D_std, n, r, df, bw = analyzer.analyze_frame_moisy(
+            gray, threshold=moisy_thresh, scale_range=scale_range)
+        # Padded size for metadata
+        padded_p = math.ceil(math.log2(max(gray.shape)))
+        padded_size = 2 ** padded_p
+        # Use log(r) and log(n) for the log-log plot
+        log_scales = np.log(r.astype(float)) if len(r) > 0 else []
+        log_counts = np.log(n.astype(float)) if len(n) > 0 else []
+        R2 = 0.0  # Not applicable for local-slope method
+        reliable = True
+        # Store binarized image as preview (uint8 for display)
+        edges = (bw.astype(np.uint8) * 255)
+        out['D_std'] = D_std
+        out['threshold'] = moisy_thresh
+        out['padded_size'] = padded_size
+        out['scale_range'] = f"{scale_range[0]}-{scale_range[1]}"
+        out['df'] = df  # local slopes for log-log highlight
+
+    elif analysis_type == 'box_counting':
+        edges = analyzer.preprocess_frame(gray, *_edge_settings(settings))
+        D, R2, log_scales, log_counts, reliable = analyzer.box_count(
+            edges, r2_threshold=settings.get('r2_threshold', 0.90))
+
+    elif analysis_type == 'dbc':
+        # Differential Box Counting (uses grayscale)
+        D, R2, log_scales, log_counts = analyzer.differential_box_count(gray)
+        edges = gray # Show grayscale in preview instead of edges?
+
+    elif analysis_type == 'fourier':
+        # Fourier Slope
+        D, R2, log_scales, log_counts = analyzer.fourier_slope(gray)
+        edges = gray # Show grayscale
+
+    out.update({
+        'D': D,
+        'R2': R2,
+        'reliable': reliable,
+        'scales': log_scales,
+        'counts': log_counts,
+        'edges': edges,
+        'edge_pixels': cv2.countNonZero(edges) if (edges is not None and analysis_type == 'box_counting') else 0,
+    })
+    return out
+
+
+def analyze_frame(analyzer, frame, frame_idx, fps, settings):
+    """Run the configured analysis method(s) on one decoded frame.
+
+    The frame is converted to grayscale once and shared by every method.
+    With several methods (``settings['analysis_types']``) the row gets
+    method-prefixed columns such as ``dbc_D`` and ``moisy_boxcount_D_std``
+    for each of them; the unprefixed fields (``D``, ``scales``, ``edges``...)
+    always describe the first method, which drives the plots.
+
+    Returns the result dictionary emitted by ``AnalysisThread.frame_processed``,
+    including the ``frame`` and ``edges`` preview images.
+    """
+    methods = analysis_methods(settings)
+
+    # Check if we need grayscale first
+    if len(frame.shape) == 3:
+        with profiling.stage('cvtColor'):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = frame
+
+    outputs = {m: _analyze_method(analyzer, m, gray, settings) for m in methods}
+
+    primary = outputs[methods[0]]
+    result = _make_result(frame_idx, fps, methods[0], primary['D'], primary['R2'],
+                          primary['reliable'], primary['scales'], primary['counts'],
+                          frame, primary['edges'])
+
+    # Moisy-specific fields
+    if methods[0] == 'moisy_boxcount':
+        for key in _MOISY_FIELDS + ('df',):
+            result[key] = primary[key]
+
+    if len(methods) > 1:
+        result['methods'] = '+'.join(methods)
+        for m, out in outputs.items():
+            for key in _METHOD_FIELDS + (_MOISY_FIELDS if m == 'moisy_boxcount' else ()):
+                result[f"{m}_{key}"] = out[key]
+
+    return result
+
+
+def analyze_frames_batch(analyzer, frames, frame_idxs, fps, settings):
+    """Analyze several frames at once, returning one result per frame.
+
+    Edge + box counting runs the whole stack through
+    :meth:`FractalAnalyzer.box_count_batch`; other methods fall back to
+    :func:`analyze_frame` per frame.
+    """
+    methods = analysis_methods(settings)
+    if methods != ['box_counting'] or len(frames) < 2:
+        return [analyze_frame(analyzer, frame, frame_idx, fps, settings)
+                for frame, frame_idx in zip(frames, frame_idxs)]
+
+    edge_settings = _edge_settings(settings)
+    edges = [analyzer.preprocess_frame(frame, *edge_settings) for frame in frames]
+    with profiling.stage('box_count'):
+        D, R2, log_scales, log_counts, reliable = analyzer.box_count_batch(
+            np.stack(edges), r2_threshold=settings.get('r2_threshold', 0.90))
+
+    results = []
+    for i, (frame, frame_idx) in enumerate(zip(frames, frame_idxs)):
+        if len(log_scales) < 2 or np.isnan(log_counts[i, 0]):
+            # Empty edge image: same as box_count's early return
+            fit = (0.0, 0.0, False, [], [])
+        else:
+            fit = (float(D[i]), R2[i], bool(reliable[i]), log_scales, log_counts[i])
+        results.append(_make_result(frame_idx, fps, methods[0], fit[0], fit[1], fit[2],
+                                    fit[3], fit[4], frame, edges[i]))
+    return results
+
+
+def analyze_range(cap, analyzer, settings, fps, start_frame, end_frame, on_result,
+                  on_progress=None, is_running=None, sample_origin=None):
+    """Serial decode/analyze loop over [start_frame, end_frame) of an open capture.
+
+    *cap* must already be positioned at *start_frame*.  Frames are sampled
+    every ``settings['sampling_rate']`` frames counted from *sample_origin*
+    (default *start_frame*), so sub-ranges of a clip pick the same frames as
+    the whole clip would.  Frames in between are skipped without being
+    converted, by grabbing or seeking (``settings['skip_mode']``, see
+    :class:`src.seeking.FrameSkipper`).  With ``settings['batch_size'] > 1``
+    sampled frames are analyzed in stacks of that size (see
+    :func:`analyze_frames_batch`).
+    """
+    sampling_rate = settings.get('sampling_rate', 1)
+    batch_size = settings.get('batch_size', 1)
+    if sample_origin is None:
+        sample_origin = start_frame
+
+    skipper = FrameSkipper(cap, settings.get('skip_mode', 'auto'))
+    frame_idx = start_frame
+    clip_total = end_frame - start_frame  # for progress bar
+    batch = []  # (frame_idx, frame) awaiting a batched analysis
+
+    def flush():
+        try:
+            idxs = [idx for idx, _ in batch]
+            for result in analyze_frames_batch(analyzer, [f for _, f in batch], idxs, fps, settings):
+                on_result(result)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"Error processing frames {batch[0][0]}-{batch[-1][0]}: {e}")
+        batch.clear()
+
+    while is_running is None or is_running():
+        # Next sampled frame at or after frame_idx
+        target = frame_idx + (sample_origin - frame_idx) % sampling_rate
+        if target >= end_frame:
+            # Trailing unsampled frames are never decoded; complete the progress
+            if on_progress is not None and clip_total > 0:
+                on_progress(clip_total - 1, clip_total)
+            break
+        with profiling.stage('skip'):
+            if not skipper.skip(frame_idx, target):
+                break
+        frame_idx = target
+        with profiling.stage('decode'):
+            ret, frame = cap.read()
+        if not ret:
+            break
+
+        if batch_size > 1:
+            batch.append((frame_idx, frame))
+            if len(batch) >= batch_size:
+                flush()
+        else:
+            try:
+                on_result(analyze_frame(analyzer, frame, frame_idx, fps, settings))
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"Error processing frame {frame_idx}: {e}")
+
+        if on_progress is not None:
+            on_progress(frame_idx - start_frame, clip_total)
+        frame_idx += 1
+
+    if batch:
+        flush()
+
+
+# Cached frames closer together than this are re-analyzed rather than seeked
+# over, since a seek decodes from the previous keyframe anyway
+_RESUME_SEEK_GAP = 250
+
+
+def _missing_runs(sampled, cached):
+    """Group the sampled frames without a cached result into [first, last + 1) runs to analyze."""
+    runs = []
+    for idx in sampled:
+        if idx in cached:
+            continue
+        if runs and idx - runs[-1][1] < _RESUME_SEEK_GAP:
+            runs[-1][1] = idx + 1
+        else:
+            runs.append([idx, idx + 1])
+    return runs
+
+
+def _analyze_span(video_path, cap, analyzer, settings, fps, start_frame, end_frame,
+                  on_result, on_progress, is_running, sample_origin):
+    """Analyze [start_frame, end_frame) serially, frame-parallel or as segments."""
+    segments = settings.get('segments', 1)
+    if segments > 1:
+        # Each segment gets its own capture and process
+        from src.parallel import analyze_segments_parallel
+        analyze_segments_parallel(video_path, settings, fps, start_frame, end_frame,
+                                  on_result, on_progress, is_running, segments=segments,
+                                  sample_origin=sample_origin)
+        return
+
+    # Seek to start
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    frame_workers = settings.get('frame_workers', 1)
+    if frame_workers > 1:
+        # One decoder here, per-frame analysis on a pool of processes
+        from src.parallel import analyze_frames_parallel
+        analyze_frames_parallel(cap, settings, fps, start_frame, end_frame, on_result,
+                                on_progress, is_running, workers=frame_workers,
+                                sample_origin=sample_origin)
+    else:
+        analyze_range(cap, analyzer, settings, fps, start_frame, end_frame, on_result,
+                      on_progress, is_running, sample_origin=sample_origin)
+
+
+def _open_result_cache(video_path, settings):
+    from src.cache import DEFAULT_RESULT_CACHE_MB, ResultCache
+    try:
+        return ResultCache(video_path, settings, settings.get('cache_dir'),
+                           settings.get('result_cache_max_mb', DEFAULT_RESULT_CACHE_MB))
+    except (OSError, sqlite3.Error) as e:
+        print(f"Result cache unavailable for {video_path}: {e}")
+        return None
+
+
+def analyze_video(video_path, settings, on_result, on_progress=None,
+                  is_running=None, analyzer=None):
+    """Decode *video_path* and analyze every sampled frame in the clip range.
+
+    *on_result* receives each result dictionary, *on_progress* receives
+    ``(current, total)`` for every decoded frame and *is_running* is polled
+    before each frame so callers can stop early.  With
+    ``settings['frame_workers'] > 1`` frames are analyzed on that many worker
+    processes; with ``settings['segments'] > 1`` the clip is split into that
+    many independently decoded segments.  Either way results are delivered
+    in the same order as the serial loop.  With ``settings['frame_cache']``
+    frames are read from (and added to) the decoded-frame cache, so result
+    ``frame`` previews are grayscale.
+
+    With ``settings['result_cache']`` every result is also saved to the
+    persistent result cache; frames already in it are delivered from there
+    (without preview images) instead of being decoded and analyzed again, so
+    an identical job finishes instantly and an interrupted one resumes.
+
+    Returns False if the video could not be opened, True otherwise.
+    """
+    if analyzer is None:
+        analyzer = analyzer_from_settings(settings)
+
+    cap = open_capture(video_path, settings)
+    if not cap.isOpened():
+        return False
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+
+    start_frame, end_frame = clip_frame_range(total_frames, fps, settings)
+    clip_total = end_frame - start_frame
+
+    cache = _open_result_cache(video_path, settings) if settings.get('result_cache') else None
+    cached = {}
+    runs = [(start_frame, end_frame)]
+    deliver = on_result
+    if cache is not None:
+        sampled = range(start_frame, end_frame, settings.get('sampling_rate', 1))
+        cached = cache.load(sampled)
+        runs = _missing_runs(sampled, cached)
+
+        def on_result(result):
+            cache.put(result)
+            deliver(result)
+
+    def emit_cached(lo, hi):
+        # Cached results of sampled frames in [lo, hi), in frame order
+        for idx in sorted(i for i in cached if lo <= i < hi):
+            deliver(cached.pop(idx))
+        if on_progress is not None and hi > lo:
+            on_progress(hi - 1 - start_frame, clip_total)
+
+    try:
+        done = start_frame
+        for lo, hi in runs:
+            if is_running is not None and not is_running():
+                break
+            emit_cached(done, lo)
+
+            def span_progress(current, _total, offset=lo - start_frame):
+                if on_progress is not None:
+                    on_progress(offset + current, clip_total)
+
+            _analyze_span(video_path, cap, analyzer, settings, fps, lo, hi, on_result,
+                          span_progress, is_running, sample_origin=start_frame)
+            done = hi
+        if is_running is None or is_running():
+            emit_cached(done, end_frame)
+    finally:
+        cap.release()
+        if cache is not None:
+            cache.close()
+    return True
@@ -0,0 +1,102 @@
+"""Optional per-stage timing of the analysis hot path (no Qt imports).
+
+Instrumented code wraps each stage in ``with profiling.stage('canny'):``.
+While no profiler is enabled that returns a shared no-op context manager,
+so the cost is one global lookup per stage.  Durations are measured with
+``time.perf_counter`` (monotonic) and kept per stage, so a report can give
+exact percentiles.  Only the process that enabled the profiler is
+measured: with frame workers or decode segments the per-frame analysis
+stages run in worker processes and are not recorded.
+"""
+import time
+
+import numpy as np
+
+_active = None
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('durations', 'start')
+
+    def __init__(self, durations):
+        self.durations = durations
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.durations.append(time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """Durations (seconds) of every timed call, per stage name."""
+
+    def __init__(self):
+        self.durations = {}
+
+    def stage(self, name):
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations.setdefault(name, [])
+        return _Stage(durations)
+
+    def add(self, name, seconds):
+        self.durations.setdefault(name, []).append(seconds)
+
+    def report(self):
+        """Per-stage statistics in milliseconds, slowest total first."""
+        stages = {}
+        for name, durations in list(self.durations.items()):
+            if not durations:
+                continue
+            ms = np.asarray(durations) * 1000.0
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            stages[name] = {
+                'calls': len(ms),
+                'total_s': float(ms.sum() / 1000.0),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(p50),
+                'p90_ms': float(p90),
+                'p99_ms': float(p99),
+                'max_ms': float(ms.max()),
+            }
+        return dict(sorted(stages.items(), key=lambda item: -item[1]['total_s']))
+
+
+def enable():
+    """Start recording into a new :class:`Profiler` and return it."""
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def disable():
+    """Stop recording; returns the profiler that was active (or None)."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active():
+    return _active
+
+
+def stage(name):
+    """Context manager timing one execution of stage *name* (no-op when disabled)."""
+    profiler = _active
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
@@ -0,0 +1,86 @@
+"""Skipping over the frames that sparse sampling does not analyze (no Qt imports).
+
+With ``sampling_rate`` > 1 only every Nth frame is needed.  The frames in
+between are either advanced over with ``grab()``, which demuxes and decodes
+but skips the BGR conversion and copy of ``read()``, or jumped over with a
+``CAP_PROP_POS_FRAMES`` seek.  A seek decodes forward from the preceding
+keyframe, so its cost depends on the video's keyframe interval rather than
+on the stride, and which of the two is cheaper differs from file to file.
+In ``'auto'`` mode :class:`FrameSkipper` measures both on the video being
+read and uses the cheaper one for each skip.
+"""
+import time
+
+import cv2
+
+SKIP_MODES = ('auto', 'grab', 'seek')
+
+# Skips shorter than this always grab: a seek costs at least a keyframe decode
+_MIN_SEEK_SKIP = 4
+
+# In auto mode, re-measure the strategy not currently preferred every this
+# many skips, since seek costs vary with the distance to the previous keyframe
+_REPROBE_EVERY = 32
+
+# Weight of the newest measurement in the running cost estimates
+_SMOOTHING = 0.25
+
+
+def _smooth(estimate, sample):
+    return sample if estimate is None else estimate + _SMOOTHING * (sample - estimate)
+
+
+class FrameSkipper:
+    """Advance a capture to the next sampled frame by grabbing or seeking.
+
+    *mode* is ``'grab'``, ``'seek'`` or ``'auto'`` (choose per skip from
+    the measured cost of one grabbed frame and of one seek).
+    """
+
+    def __init__(self, cap, mode='auto'):
+        if mode not in SKIP_MODES:
+            raise ValueError(f"Unknown skip mode {mode!r}; expected one of {SKIP_MODES}")
+        self.cap = cap
+        self.mode = mode
+        self.grab_cost = None  # seconds per grabbed frame
+        self.seek_cost = None  # seconds per seek
+        self.can_seek = True
+        self._skips = 0
+
+    def _use_seek(self, count):
+        if not self.can_seek or self.mode == 'grab':
+            return False
+        if self.mode == 'seek':
+            return True
+        if count < _MIN_SEEK_SKIP or self.grab_cost is None:
+            return False
+        if self.seek_cost is None:
+            return True
+        self._skips += 1
+        prefer_seek = self.seek_cost < count * self.grab_cost
+        if self._skips % _REPROBE_EVERY == 0:
+            return not prefer_seek
+        return prefer_seek
+
+    def skip(self, frame_idx, target):
+        """Move the capture from *frame_idx* to *target* without decoding what is in between.
+
+        Returns False if the end of the video was reached first.
+        """
+        count = target - frame_idx
+        if count <= 0:
+            return True
+        if self._use_seek(count):
+            start = time.perf_counter()
+            if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                self.seek_cost = _smooth(self.seek_cost, time.perf_counter() - start)
+                return True
+            # Not seekable (e.g. a stream): grab from here on
+            self.can_seek = False
+
+        start = time.perf_counter()
+        for _ in range(count):
+            if not self.cap.grab():
+                return False
+        self.grab_cost = _smooth(self.grab_cost, (time.perf_counter() - start) / count)
+        return True
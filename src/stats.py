@@ -0,0 +1,191 @@
+"""Streaming summary statistics of per-frame D values."""
+import math
+
+import numpy as np
+
+# Range the histogram sketch resolves; values outside only count as under/overflow
+HIST_RANGE = (0.0, 4.0)
+# Sketch resolution (bounds the median error to half of it)
+SKETCH_BIN_WIDTH = 0.001
+# Width of the bars shown in the GUI histogram (a multiple of the sketch bins)
+DISPLAY_BIN_WIDTH = 0.05
+
+OPTIMAL_RANGE = (1.3, 1.5)
+
+
+class StreamingStats:
+    """Constant-time running statistics of a stream of D values.
+
+    Keeps Welford's running mean and variance, min/max, a counter of
+    values inside *optimal* and a fixed-bin histogram of
+    ``SKETCH_BIN_WIDTH``-wide bins over ``HIST_RANGE``.  The histogram
+    doubles as the quantile sketch: the median is interpolated inside the
+    bin holding the middle value, so it is accurate to half a bin width.
+    Every update and every query costs O(1) in the number of values seen.
+    Non-finite values (failed frames) are left out of the statistics and
+    only counted, in ``non_finite``.
+    """
+
+    def __init__(self, optimal=OPTIMAL_RANGE):
+        self.optimal = optimal
+        self.n_bins = int(round((HIST_RANGE[1] - HIST_RANGE[0]) / SKETCH_BIN_WIDTH))
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.non_finite = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.in_optimal = 0
+        self.underflow = 0
+        self.overflow = 0
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, values, optimal=OPTIMAL_RANGE):
+        stats = cls(optimal)
+        stats.extend(values)
+        return stats
+
+    def _bin(self, value):
+        return math.floor((value - HIST_RANGE[0]) / SKETCH_BIN_WIDTH)
+
+    def add(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            self.non_finite += 1
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.optimal[0] <= value <= self.optimal[1]:
+            self.in_optimal += 1
+        b = self._bin(value)
+        if b < 0:
+            self.underflow += 1
+        elif b >= self.n_bins:
+            self.overflow += 1
+        else:
+            self.counts[b] += 1
+
+    def extend(self, values):
+        """Add many values at once (Chan et al.'s pairwise combination of the moments)."""
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.non_finite += int(np.count_nonzero(~finite))
+            values = values[finite]
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.in_optimal += int(np.count_nonzero((values >= self.optimal[0]) & (values <= self.optimal[1])))
+        bins = np.floor((values - HIST_RANGE[0]) / SKETCH_BIN_WIDTH)
+        self.underflow += int(np.count_nonzero(bins < 0))
+        self.overflow += int(np.count_nonzero(bins >= self.n_bins))
+        inside = bins[(bins >= 0) & (bins < self.n_bins)].astype(np.int64)
+        self.counts += np.bincount(inside, minlength=self.n_bins)
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1, as pandas)."""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    @property
+    def percent_optimal(self):
+        return 100.0 * self.in_optimal / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """Approximate *q*-quantile from the histogram sketch."""
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        if rank <= self.underflow:
+            return self.min
+        cum = np.cumsum(self.counts)
+        b = int(np.searchsorted(cum, rank - self.underflow))
+        if b >= self.n_bins:
+            return self.max
+        before = self.underflow + (cum[b - 1] if b > 0 else 0)
+        frac = (rank - before) / self.counts[b]
+        value = HIST_RANGE[0] + (b + frac) * SKETCH_BIN_WIDTH
+        return min(max(value, self.min), self.max)
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def display_histogram(self):
+        """(bin edges, counts) of the ``DISPLAY_BIN_WIDTH`` bars shown in the GUI."""
+        group = int(round(DISPLAY_BIN_WIDTH / SKETCH_BIN_WIDTH))
+        counts = self.counts.reshape(-1, group).sum(axis=1)
+        edges = HIST_RANGE[0] + DISPLAY_BIN_WIDTH * np.arange(len(counts) + 1)
+        return edges, counts
+
+    def summary(self):
+        """Same keys as the D statistics of the JSON summary."""
+        return {
+            "mean_D": float(self.mean) if self.count else math.nan,
+            "median_D": float(self.median),
+            "std_D": float(self.std),
+            "min_D": float(self.min) if self.count else math.nan,
+            "max_D": float(self.max) if self.count else math.nan,
+            "percent_optimal": float(self.percent_optimal),
+            "non_finite_D": self.non_finite,
+        }
+
+
+class StreamingSummary:
+    """Running aggregates behind the JSON summary, updated one result at a time.
+
+    ``summary()`` returns the same fields as ``src.utils.summarize_results``
+    without keeping any per-frame data (the median comes from the
+    ``StreamingStats`` sketch).
+    """
+
+    def __init__(self):
+        self.d_stats = StreamingStats()
+        self.method_stats = {}
+        self.d_std_sum = 0.0
+        self.rows = 0
+        self.first = None
+
+    def add(self, result):
+        if self.first is None:
+            self.first = {k: v for k, v in result.items() if np.ndim(v) == 0}
+            if 'methods' in result:
+                self.method_stats = {m: StreamingStats() for m in str(result['methods']).split('+')}
+        self.rows += 1
+        self.d_stats.add(result['D'])
+        if 'D_std' in result:
+            self.d_std_sum += float(result['D_std'])
+        for m, stats in self.method_stats.items():
+            stats.add(result[f"{m}_D"])
+
+    def summary(self, video_path):
+        summary = self.d_stats.summary()
+        summary["total_frames"] = self.rows
+        summary["video_path"] = video_path
+        first = self.first or {}
+        # Add Moisy-specific summary fields if applicable
+        if 'D_std' in first:
+            summary["mean_D_std"] = self.d_std_sum / self.rows
+            summary["threshold"] = float(first['threshold'])
+            summary["padded_size"] = int(first['padded_size'])
+            summary["scale_range"] = str(first['scale_range'])
+        if self.method_stats:
+            summary["methods"] = {m: stats.summary() for m, stats in self.method_stats.items()}
+        return summary
@@ -0,0 +1,274 @@
+"""Compact columnar stores for per-frame analysis data."""
+import numpy as np
+
+from src.core import _linregress
+
+
+def _column_dtype(value):
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    if isinstance(value, (int, np.integer)):
+        return np.dtype(np.int64)
+    if isinstance(value, (float, np.floating)):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _fill_value(dtype):
+    if dtype == np.float64:
+        return np.nan
+    if dtype == object:
+        return None
+    return dtype.type(0)
+
+
+# Canonical column order of result rows: the field order of the rows built by
+# src.pipeline, then the method-prefixed columns of a multi-method pass
+_RESULT_FIELDS = ('frame_idx', 'timestamp', 'D', 'R2', 'reliable', 'scales', 'counts',
+                  'edge_pixels', 'method', 'D_std', 'threshold', 'padded_size',
+                  'scale_range', 'df', 'methods')
+_METHODS = ('moisy_boxcount', 'box_counting', 'dbc', 'fourier')
+_METHOD_FIELDS = ('D', 'R2', 'reliable', 'scales', 'counts', 'edge_pixels',
+                  'D_std', 'threshold', 'padded_size', 'scale_range')
+
+
+def _column_rank(name):
+    if name in _RESULT_FIELDS:
+        return (0, _RESULT_FIELDS.index(name), 0)
+    for m, method in enumerate(_METHODS):
+        field = name[len(method) + 1:] if name.startswith(method + '_') else None
+        if field in _METHOD_FIELDS:
+            return (1, m, _METHOD_FIELDS.index(field))
+    return (2, 0, 0)
+
+
+def canonical_columns(names):
+    """*names* in the canonical result column order; unknown names follow in their given order.
+
+    Exports must not depend on the key order of whichever result dict
+    arrived first, so both ``ResultStore`` and ``StreamingResultWriter``
+    order their columns with this.
+    """
+    return sorted(names, key=_column_rank)
+
+
+class ResultStore:
+    """Per-frame result fields as preallocated columns that grow by doubling.
+
+    Each key of the appended result dictionaries becomes one NumPy column,
+    typed from its first value: bools, int64 and float64 for scalars, object
+    for strings and the log-log arrays, kept in :func:`canonical_columns`
+    order.  Appending is amortized O(1), and
+    ``store['D']`` or :meth:`to_dataframe` expose the filled rows as views,
+    so plots, statistics and exports never rebuild per-row lists.  Rows
+    missing a column get NaN, 0, False or None.
+    """
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._capacity = capacity
+        self._columns = {}
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, name):
+        """View of column *name* over the stored rows."""
+        return self._columns[name][:self._size]
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @classmethod
+    def from_results(cls, results):
+        store = cls(capacity=max(len(results), 1))
+        for result in results:
+            store.append(result)
+        return store
+
+    def clear(self):
+        self._size = 0
+        self._columns = {}
+
+    def _add_column(self, name, dtype):
+        self._columns[name] = np.full(self._capacity, _fill_value(dtype), dtype=dtype)
+        self._columns = {n: self._columns[n] for n in canonical_columns(self._columns)}
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.full(self._capacity, _fill_value(col.dtype), dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, result):
+        """Append one result dictionary (preview images should already be removed)."""
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        for name, value in result.items():
+            col = self._columns.get(name)
+            if col is None:
+                self._add_column(name, _column_dtype(value))
+                col = self._columns[name]
+            elif col.dtype != object and _column_dtype(value) != col.dtype:
+                # e.g. an int 0 timestamp followed by floats: widen the column
+                col = col.astype(np.result_type(col.dtype, _column_dtype(value)))
+                self._columns[name] = col
+            col[i] = value
+        # Columns this row does not have keep their fill value
+        for name, col in self._columns.items():
+            if name not in result:
+                col[i] = _fill_value(col.dtype)
+        self._size += 1
+
+    def row(self, i):
+        """Result dictionary of row *i* (negative indices count from the end)."""
+        if i < 0:
+            i += self._size
+        return {name: col[i] for name, col in self._columns.items()}
+
+    def to_dataframe(self):
+        """DataFrame over the stored rows, sharing memory with the columns."""
+        import pandas as pd
+        return pd.DataFrame({name: self[name] for name in self._columns}, copy=False)
+
+
+class CountStore:
+    """Per-frame log-log count pyramids, kept so D can be refit without re-analysis.
+
+    Rows hold ``frame_idx``, ``timestamp`` and the ``(log_scales, log_counts)``
+    arrays of a result, NaN-padded to a common width in two preallocated 2-D
+    arrays that grow by doubling.  Refitting every frame is then a handful of
+    vectorized NumPy calls.
+    """
+
+    def __init__(self, capacity=1024, width=16):
+        self._size = 0
+        self.frame_idx = np.zeros(capacity, dtype=np.int64)
+        self.timestamp = np.zeros(capacity)
+        self.n_points = np.zeros(capacity, dtype=np.int64)
+        self._log_scales = np.full((capacity, width), np.nan)
+        self._log_counts = np.full((capacity, width), np.nan)
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_results(cls, results):
+        store = cls(capacity=max(len(results), 1))
+        for result in results:
+            store.append_result(result)
+        return store
+
+    @property
+    def log_scales(self):
+        """(N, K) view of the stored log scales (NaN past each row's n_points)."""
+        return self._log_scales[:self._size]
+
+    @property
+    def log_counts(self):
+        """(N, K) view of the stored log counts (NaN past each row's n_points)."""
+        return self._log_counts[:self._size]
+
+    def clear(self):
+        self._size = 0
+
+    def _reserve(self, rows, width):
+        capacity, cur_width = self._log_scales.shape
+        if rows <= capacity and width <= cur_width:
+            return
+        new_capacity = max(rows, 2 * capacity) if rows > capacity else capacity
+        new_width = max(width, cur_width)
+        for name in ('frame_idx', 'timestamp', 'n_points'):
+            old = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+        for name in ('_log_scales', '_log_counts'):
+            old = getattr(self, name)
+            grown = np.full((new_capacity, new_width), np.nan)
+            grown[:self._size, :cur_width] = old[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, frame_idx, timestamp, log_scales, log_counts):
+        k = len(log_scales)
+        self._reserve(self._size + 1, k)
+        i = self._size
+        self.frame_idx[i] = frame_idx
+        self.timestamp[i] = timestamp
+        self.n_points[i] = k
+        self._log_scales[i, :] = np.nan
+        self._log_counts[i, :] = np.nan
+        self._log_scales[i, :k] = log_scales
+        self._log_counts[i, :k] = log_counts
+        self._size += 1
+
+    def append_result(self, result):
+        """Append the log-log arrays of an analysis result dictionary."""
+        self.append(result['frame_idx'], result['timestamp'],
+                    result.get('scales', []), result.get('counts', []))
+
+    def _row_groups(self):
+        """Yield (rows, k) for groups of rows sharing the same number of points."""
+        n_points = self.n_points[:self._size]
+        for k in np.unique(n_points):
+            yield np.flatnonzero(n_points == k), int(k)
+
+    def moisy_dimension(self, scale_range=(4, 8)):
+        """Refit Moisy's local-slope D for every frame (see ``moisy_fractal_dimension``).
+
+        The stored arrays are log(r) and log(n), so the local slopes and
+        their mean over *scale_range* are exactly those of the original run.
+
+        Returns (D, D_std) arrays; frames without foreground get 0.
+        """
+        D = np.zeros(self._size)
+        D_std = np.zeros(self._size)
+        lo = max(0, scale_range[0] - 1)  # MATLAB→Python
+
+        for rows, k in self._row_groups():
+            hi = min(k - 1, scale_range[1])
+            if hi <= lo:
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                df = -np.diff(self._log_counts[rows, :k], axis=1) / np.diff(self._log_scales[rows, :k], axis=1)
+                D[rows] = np.mean(df[:, lo:hi], axis=1)
+                D_std[rows] = np.std(df[:, lo:hi], axis=1)
+
+        # Guard against NaN from degenerate frames
+        bad = np.isnan(D) | np.isnan(D_std)
+        D[bad] = 0.0
+        D_std[bad] = 0.0
+        return D, D_std
+
+    def regression(self, r2_threshold=0.90, d_range=(1.0, 2.0)):
+        """Refit the global log-log regression of every frame (as in ``box_count``).
+
+        Returns (D, R_squared, reliable).  D is clamped to *d_range* and
+        reliable requires R² >= *r2_threshold* with the raw slope inside
+        *d_range*; pass ``d_range=None`` for the raw slope (DBC).  Frames with
+        fewer than two points get D = R² = 0 and reliable = False.
+        """
+        D = np.zeros(self._size)
+        R_squared = np.zeros(self._size)
+        reliable = np.zeros(self._size, dtype=bool)
+
+        # One vectorized fit over every frame; the NaN padding is ignored
+        rows = np.flatnonzero(self.n_points[:self._size] >= 2)
+        if not len(rows):
+            return D, R_squared, reliable
+        slope, _, r_value = _linregress(self._log_scales[rows], self._log_counts[rows])
+        R_squared[rows] = r_value ** 2
+        if d_range is None:
+            D[rows] = slope
+            reliable[rows] = R_squared[rows] >= r2_threshold
+        else:
+            D[rows] = np.clip(slope, *d_range)
+            reliable[rows] = ((R_squared[rows] >= r2_threshold)
+                              & (slope >= d_range[0]) & (slope <= d_range[1]))
+        return D, R_squared, reliable
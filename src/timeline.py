@@ -0,0 +1,116 @@
+"""Level-of-detail rendering of long time series on a matplotlib canvas (no Qt imports)."""
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def minmax_decimate(x, y, x_min, x_max, n_bins):
+    """Reduce sorted *x* / *y* to what is visible in [x_min, x_max] at *n_bins* columns.
+
+    Each of the *n_bins* columns keeps only its minimum and maximum point
+    (in their original order), so spikes survive and the line looks the
+    same as the full series at that pixel width.  One point beyond each
+    edge of the window is kept so the line runs off-screen.  Series that
+    already fit are returned as views; otherwise non-finite *y* values
+    (failed frames) are left out, which matplotlib would draw as gaps.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    lo = max(int(np.searchsorted(x, x_min, side='left')) - 1, 0)
+    hi = min(int(np.searchsorted(x, x_max, side='right')) + 1, len(x))
+    xs, ys = x[lo:hi], y[lo:hi]
+    if len(xs) <= 2 * n_bins or x_max <= x_min:
+        return xs, ys
+    finite = np.isfinite(ys)
+    if not finite.all():
+        xs, ys = xs[finite], ys[finite]
+        if not len(xs):
+            return xs, ys
+
+    bins = np.clip(((xs - x_min) * (n_bins / (x_max - x_min))).astype(np.int64), -1, n_bins)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+    lengths = np.diff(np.append(starts, len(xs)))
+
+    # Index of the first minimum / maximum inside each column
+    ymin = np.minimum.reduceat(ys, starts)
+    ymax = np.maximum.reduceat(ys, starts)
+    at_min = np.flatnonzero(ys == np.repeat(ymin, lengths))
+    at_max = np.flatnonzero(ys == np.repeat(ymax, lengths))
+    imin = at_min[np.searchsorted(at_min, starts)]
+    imax = at_max[np.searchsorted(at_max, starts)]
+
+    keep = np.sort(np.stack([imin, imax], axis=1), axis=1).ravel()
+    keep = keep[np.concatenate(([True], np.diff(keep) != 0))]
+    return xs[keep], ys[keep]
+
+
+class BlittedTimeline:
+    """Animated line artist redrawn by blitting, decimated to the visible window.
+
+    The rest of the axes (grid, ticks, labels) is rendered once into a
+    cached background on every full draw; :meth:`redraw` then only restores
+    that background and draws the line.  Whenever the x-limits change (pan,
+    zoom or auto-scroll) the line is re-decimated to about one min/max pair
+    per pixel column, so drawing cost does not grow with the series length.
+    """
+
+    def __init__(self, canvas, ax, line):
+        self.canvas = canvas
+        self.ax = ax
+        self.line = line
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+        self._n_bins = 0
+        self._background = None
+        self._static = False
+        line.set_animated(True)
+        canvas.mpl_connect('draw_event', self._on_draw)
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def set_data(self, x, y):
+        """Show the series (*x* sorted ascending); keeps references, not copies."""
+        self._x = x
+        self._y = y
+        self._decimate()
+
+    def _decimate(self):
+        if self._static:
+            return
+        x_min, x_max = self.ax.get_xlim()
+        self._n_bins = max(int(self.ax.bbox.width), 1)
+        self.line.set_data(*minmax_decimate(self._x, self._y, x_min, x_max, self._n_bins))
+
+    def _on_xlim_changed(self, ax):
+        self._decimate()
+
+    def _on_draw(self, event):
+        if self._static:
+            return
+        # Resized since the last decimation: one min/max pair per new pixel column
+        if int(self.ax.bbox.width) != self._n_bins:
+            self._decimate()
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def redraw(self):
+        """Blit the line onto the cached background (full draw if there is none yet)."""
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    @contextmanager
+    def static(self):
+        """Draw the full-resolution line as a regular artist, e.g. while saving the figure."""
+        self._static = True
+        self.line.set_animated(False)
+        self.line.set_data(self._x, self._y)
+        try:
+            yield
+        finally:
+            self._static = False
+            self.line.set_animated(True)
+            self._decimate()
+            self.canvas.draw()
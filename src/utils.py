@@ -1,10 +1,235 @@
-import pandas as pd
+import os
+import importlib.util
+import numpy as np
 import json
 
+# Binary exports are Parquet if pyarrow is installed, NPZ otherwise
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+BINARY_RESULTS_EXT = '.parquet' if PARQUET_AVAILABLE else '.npz'
+
+def _as_dataframe(data):
+    """DataFrame of per-frame results given as a ResultStore or a list of dicts."""
+    if hasattr(data, 'to_dataframe'):
+        return data.to_dataframe()
+    import pandas as pd  # imported on first use (slow to import)
+    return pd.DataFrame(data)
+
 def save_results_to_csv(data, filepath):
-    df = pd.DataFrame(data)
+    df = _as_dataframe(data)
     df.to_csv(filepath, index=False)
 
+def _binary_columns(data):
+    """Typed columns of *data* for binary export, in column order.
+
+    Scalar columns are arrays; ragged (log-log array) columns are
+    ``(values, offsets)``: the concatenated float64 values and the int64
+    start offset of every row plus the total.
+    """
+    df = _as_dataframe(data)
+    columns = {}
+    for name in df.columns:
+        col = df[name].to_numpy()
+        if col.dtype != object:
+            columns[name] = col
+            continue
+        first = next((v for v in col if v is not None), None)
+        if isinstance(first, (list, tuple, np.ndarray)):
+            arrays = [np.asarray(v if v is not None else [], dtype=np.float64).ravel() for v in col]
+            offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+            np.cumsum([len(a) for a in arrays], out=offsets[1:])
+            values = np.concatenate(arrays) if arrays else np.empty(0)
+            columns[name] = (values, offsets)
+        else:
+            columns[name] = np.array(['' if v is None else str(v) for v in col])
+    return columns
+
+def save_results_binary(data, filepath):
+    """Save per-frame results to a compact binary file that loads back quickly.
+
+    Scalars are stored as typed columns and the log-log ``scales``/``counts``
+    arrays as list columns (Parquet) or as values + offsets arrays (NPZ), so
+    nothing is stringified.  Writes Parquet if pyarrow is installed and NPZ
+    otherwise; the extension of *filepath* is replaced accordingly and the
+    path actually written is returned.
+    """
+    filepath = os.path.splitext(filepath)[0] + BINARY_RESULTS_EXT
+    columns = _binary_columns(data)
+    if PARQUET_AVAILABLE:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = {}
+        for name, col in columns.items():
+            if isinstance(col, tuple):
+                values, offsets = col
+                table[name] = pa.LargeListArray.from_arrays(pa.array(offsets), pa.array(values))
+            else:
+                table[name] = pa.array(col)
+        pq.write_table(pa.table(table), filepath)
+    else:
+        arrays = {}
+        for name, col in columns.items():
+            if isinstance(col, tuple):
+                arrays[f"{name}.values"], arrays[f"{name}.offsets"] = col
+            else:
+                arrays[name] = col
+        np.savez(filepath, **arrays)
+    return filepath
+
+def load_results_binary(filepath, columns=None):
+    """Load a file written by ``save_results_binary`` into a DataFrame.
+
+    Log-log columns come back as one float64 array per row.  Pass *columns*
+    to read only those (e.g. ``['frame_idx', 'D']`` when aggregating many
+    files, which skips the log-log arrays entirely).
+    """
+    if filepath.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(filepath, columns=columns).to_pandas()
+
+    data = {}
+    with np.load(filepath, allow_pickle=False) as npz:
+        names = [k for k in npz.files if not k.endswith('.offsets')]
+        for key in names:
+            name = key[:-len('.values')] if key.endswith('.values') else key
+            if columns is not None and name not in columns:
+                continue
+            if key.endswith('.values'):
+                values, offsets = npz[key], npz[f"{name}.offsets"]
+                rows = np.empty(len(offsets) - 1, dtype=object)
+                for i in range(len(rows)):
+                    rows[i] = values[offsets[i]:offsets[i + 1]]
+                data[name] = rows
+            else:
+                data[name] = npz[key]
+    import pandas as pd
+    return pd.DataFrame(data, columns=columns)
+
+def load_results_many(filepaths, columns=None):
+    """Concatenate binary result files into one DataFrame for meta-analysis.
+
+    A ``source`` column holds the file each row came from.
+    """
+    import pandas as pd
+    frames = []
+    for path in filepaths:
+        df = load_results_binary(path, columns)
+        df['source'] = path
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
 def save_summary_json(summary_dict, filepath):
     with open(filepath, 'w') as f:
         json.dump(summary_dict, f, indent=4)
+
+def batch_output_paths(video_path, output_dir=None):
+    """Output file paths for a batch-processed video (next to the video by default)."""
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    folder = output_dir if output_dir else os.path.dirname(video_path)
+    return {
+        'csv': os.path.join(folder, f"fractal_analysis_{base}.csv"),
+        'columns': os.path.join(folder, f"fractal_analysis_{base}.columns"),
+        'binary': os.path.join(folder, f"fractal_analysis_{base}{BINARY_RESULTS_EXT}"),
+        'json': os.path.join(folder, f"fractal_summary_{base}.json"),
+        'timeseries': os.path.join(folder, f"fractal_timeseries_{base}.png"),
+        'loglog': os.path.join(folder, f"fractal_loglog_{base}.png"),
+        'profile': os.path.join(folder, f"fractal_profile_{base}.json"),
+    }
+
+def summarize_results(data, video_path, stats=None):
+    """Summary statistics of the per-frame results written to the batch JSON.
+
+    If the D values were already accumulated in a ``StreamingStats``, pass it
+    as *stats* to take the D statistics from it instead of rescanning *data*
+    (the median is then approximate, see ``src.stats``).
+    """
+    df = _as_dataframe(data)
+    s = df['D']
+    summary = stats.summary() if stats is not None else _d_statistics(s)
+    summary["total_frames"] = len(s)
+    summary["video_path"] = video_path
+    # Add Moisy-specific summary fields if applicable
+    if 'D_std' in df.columns:
+        summary["mean_D_std"] = float(df['D_std'].mean())
+        summary["threshold"] = float(df['threshold'].iloc[0])
+        summary["padded_size"] = int(df['padded_size'].iloc[0])
+        summary["scale_range"] = str(df['scale_range'].iloc[0])
+    # Per-method statistics of a multi-method single pass
+    if 'methods' in df.columns:
+        summary["methods"] = {m: _d_statistics(df[f"{m}_D"])
+                              for m in str(df['methods'].iloc[0]).split('+')}
+    return summary
+
+def _d_statistics(s):
+    # Failed frames (NaN or infinite D) are only counted, as in StreamingStats
+    finite = s[np.isfinite(s.to_numpy(dtype=float))]
+    return {
+        "mean_D": float(finite.mean()),
+        "median_D": float(finite.median()),
+        "std_D": float(finite.std()),
+        "min_D": float(finite.min()),
+        "max_D": float(finite.max()),
+        "percent_optimal": float(((finite >= 1.3) & (finite <= 1.5)).mean() * 100),
+        "non_finite_D": len(s) - len(finite),
+    }
+
+# --- Headless plot export (publication style, no Qt) ---
+
+PLOT_ACCENT = "#d4a574"
+PLOT_RED = "#e74c3c"
+
+def _new_publication_figure():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(4, 3), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.grid(True, color='#cccccc', alpha=0.5)
+    return fig, ax
+
+def save_timeseries_plot(data, filepath, dpi=300):
+    """Save the full-timeline D(t) plot for *data* without a GUI."""
+    fig, ax = _new_publication_figure()
+    df = _as_dataframe(data)
+    timestamps = df['timestamp'] if len(df) else []
+    Ds = df['D'] if len(df) else []
+    ax.plot(timestamps, Ds, color=PLOT_ACCENT, linewidth=1.5)
+    ax.set_title("Fractal Dimension D(t)")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("D")
+    ax.set_ylim(0.5, 2.5)
+    if len(timestamps):
+        t_min, t_max = timestamps.min(), timestamps.max()
+        margin = max((t_max - t_min) * 0.02, 1)
+        ax.set_xlim(t_min - margin, t_max + margin)
+    fig.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
+
+def save_loglog_plot(result, filepath, dpi=300):
+    """Save the log-log plot of a single frame result without a GUI."""
+    fig, ax = _new_publication_figure()
+    scales = result.get('scales', [])
+    counts = result.get('counts', [])
+    method = result.get('method', 'box_counting')
+    ax.set_title("Log-Log Plot")
+    ax.set_xlabel("log(1/s)")
+    ax.set_ylabel("log(N(s))")
+    if len(scales) > 0 and len(counts) > 0:
+        ax.plot(scales, counts, 'o-', color=PLOT_RED, markersize=4)
+        if method == 'moisy_boxcount':
+            parts = result.get('scale_range', '4-8').split('-')
+            lo_pt = max(0, int(parts[0]) - 1)
+            hi_pt = min(len(scales), int(parts[1]) + 1)
+            ax.plot(scales[lo_pt:hi_pt], counts[lo_pt:hi_pt],
+                    's', color=PLOT_ACCENT, markersize=8, zorder=5,
+                    label=f"Scales {parts[0]}–{parts[1]}")
+            ax.set_title(f"Log-Log  D = {result['D']:.4f} ± {result.get('D_std', 0):.4f}")
+            ax.set_xlabel("log(R)")
+            ax.set_ylabel("log(N)")
+            ax.legend(facecolor='white', edgecolor='#cccccc', fontsize='small')
+        else:
+            reliability = "" if result.get('reliable', True) else " [UNRELIABLE]"
+            ax.set_title(f"Log-Log (D={result['D']:.2f}, R²={result['R2']:.2f}){reliability}",
+                         color=PLOT_RED if reliability else 'black')
+            if method == 'fourier':
+                ax.set_xlabel("log(Frequency)")
+                ax.set_ylabel("log(Power)")
+    fig.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
@@ -1,154 +1,137 @@
-import math
+import time
 
 import cv2
 import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
-import time
-from src.core import FractalAnalyzer
+from PyQt5.QtGui import QImage
+from src import profiling
+from src.pipeline import analyze_video, analyzer_from_settings
+
+# Results are sent to the GUI in batches at most this often (seconds) ...
+RESULT_FLUSH_INTERVAL = 0.05
+# ... or as soon as this many are pending
+RESULT_BATCH_MAX = 500
+# Progress updates are coalesced to at most one per interval (seconds)
+PROGRESS_INTERVAL = 0.05
+
+
+def preview_image(image, size):
+    """Downscale a BGR or grayscale frame to fit *size* (w, h) and wrap it in a QImage.
+
+    The QImage owns a copy of the pixels, so it can be sent to the GUI thread.
+    """
+    h, w = image.shape[:2]
+    scale = min(size[0] / w, size[1] / h, 1.0)
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        fmt = QImage.Format_RGB888
+    else:
+        fmt = QImage.Format_Grayscale8
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    h, w = image.shape[:2]
+    return QImage(image.data, w, h, image.strides[0], fmt).copy()
+
 
 class AnalysisThread(QThread):
     progress_updated = pyqtSignal(int, int) # current_frame, total_frames
-    frame_processed = pyqtSignal(dict) # result data dictionary
+    frame_processed = pyqtSignal(object) # result data dictionary (numeric only)
+    results_ready = pyqtSignal(object) # batch of result dictionaries, in frame order
+    preview_ready = pyqtSignal(object, object) # frame QImage, edges QImage (or None)
     analysis_finished = pyqtSignal()
-    
+
     def __init__(self, video_path, settings=None):
         super().__init__()
         self.video_path = video_path
         self.settings = settings if settings else {}
         self._is_running = True
-        self.analyzer = FractalAnalyzer()
+        self.analyzer = analyzer_from_settings(self.settings)
+
+        # Previews are downscaled here, at most preview_max_fps per second
+        self.preview_size = self.settings.get('preview_size', (400, 300))
+        max_fps = self.settings.get('preview_max_fps', 10)
+        self._preview_interval = 1.0 / max_fps if max_fps > 0 else None
+        self._last_preview = -float('inf')
+        self._pending_preview = None
+
+        self._pending_results = []
+        self._last_flush = time.monotonic()
+        self._progress = None  # latest (current, total) not yet emitted
+        self._last_progress = -float('inf')
+
+    def _emit_preview(self):
+        frame, edges = self._pending_preview
+        self._pending_preview = None
+        self._last_preview = time.monotonic()
+        with profiling.stage('preview'):
+            frame_image = preview_image(frame, self.preview_size) if frame is not None else None
+            edges_image = preview_image(edges, self.preview_size) if edges is not None else None
+        with profiling.stage('emit'):
+            self.preview_ready.emit(frame_image, edges_image)
+
+    def _deliver(self, result):
+        frame = result.pop('frame', None)
+        edges = result.pop('edges', None)
+        if self._preview_interval is not None and (frame is not None or edges is not None):
+            self._pending_preview = (frame, edges)
+            if time.monotonic() - self._last_preview >= self._preview_interval:
+                self._emit_preview()
+        # Only pay for per-result signals if someone listens to them
+        if self.receivers(self.frame_processed) > 0:
+            with profiling.stage('emit'):
+                self.frame_processed.emit(result)
+        self._pending_results.append(result)
+        if len(self._pending_results) >= RESULT_BATCH_MAX:
+            self._flush_results()
+        else:
+            self._maybe_flush()
+
+    def _flush_results(self):
+        self._last_flush = time.monotonic()
+        if self._pending_results:
+            batch, self._pending_results = self._pending_results, []
+            with profiling.stage('emit'):
+                self.results_ready.emit(batch)
+
+    def _maybe_flush(self):
+        if self._pending_results and time.monotonic() - self._last_flush >= RESULT_FLUSH_INTERVAL:
+            self._flush_results()
+
+    def _update_progress(self, current, total):
+        self._progress = (current, total)
+        if time.monotonic() - self._last_progress >= PROGRESS_INTERVAL:
+            self._emit_progress()
+        # Slow methods: don't hold finished results back until the next one
+        self._maybe_flush()
+
+    def _emit_progress(self):
+        if self._progress is not None:
+            self._last_progress = time.monotonic()
+            self.progress_updated.emit(*self._progress)
+            self._progress = None
 
     def run(self):
         try:
-            cap = cv2.VideoCapture(self.video_path)
-            if not cap.isOpened():
+            opened = analyze_video(
+                self.video_path, self.settings,
+                on_result=self._deliver,
+                on_progress=self._update_progress,
+                is_running=lambda: self._is_running,
+                analyzer=self.analyzer)
+            if not opened:
                 print(f"Error: Could not open video {self.video_path}")
                 return
-                
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-
-            # Sampling rate
-            sampling_rate = self.settings.get('sampling_rate', 1)
-
-            # Clip range (seconds → frames)
-            clip_start_sec = self.settings.get('clip_start_sec', 0)
-            clip_end_sec   = self.settings.get('clip_end_sec', 0)
-
-            start_frame = int(clip_start_sec * fps) if fps > 0 else 0
-            start_frame = max(0, min(start_frame, total_frames - 1))
-
-            if clip_end_sec > 0:
-                end_frame = int(clip_end_sec * fps) if fps > 0 else total_frames
-                end_frame = max(start_frame + 1, min(end_frame, total_frames))
-            else:
-                end_frame = total_frames  # 00:00:00 end = full video
-
-            # Seek to start
-            if start_frame > 0:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-
-            frame_idx = start_frame
-            clip_total = end_frame - start_frame  # for progress bar
-
-            while self._is_running:
-                if frame_idx >= end_frame:
-                    break
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                if (frame_idx - start_frame) % sampling_rate == 0:
-                    try:
-                        # Process frame
-                        # Process frame based on method
-                        analysis_type = self.settings.get('analysis_type', 'box_counting')
-                        
-                        D = 0.0
-                        R2 = 0.0
-                        log_scales = []
-                        log_counts = []
-                        edges = None
-                        
-                        # Check if we need grayscale first
-                        if len(frame.shape) == 3:
-                             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                        else:
-                             gray = frame
-                        
-                        reliable = True
-
-                        if analysis_type == 'moisy_boxcount':
-                            moisy_thresh = self.settings.get('moisy_threshold', 0.25)
-                            scale_range = self.settings.get('scale_range', (4, 8))
-                            D, D_std, n, r, df, bw = self.analyzer.analyze_frame_moisy(
-                                frame, threshold=moisy_thresh, scale_range=scale_range)
-                            # Padded size for metadata
-                            padded_p = math.ceil(math.log2(max(gray.shape)))
-                            padded_size = 2 ** padded_p
-                            # Use log(r) and log(n) for the log-log plot
-                            log_scales = np.log(r.astype(float)) if len(r) > 0 else []
-                            log_counts = np.log(n.astype(float)) if len(n) > 0 else []
-                            R2 = 0.0  # Not applicable for local-slope method
-                            reliable = True
-                            # Store binarized image as preview (uint8 for display)
-                            edges = (bw.astype(np.uint8) * 255)
-
-                        elif analysis_type == 'box_counting':
-                            method = self.settings.get('edge_method', 'canny')
-                            threshold_mode = self.settings.get('threshold_mode', 'auto')
-                            manual_thresholds = self.settings.get('manual_thresholds', (100, 200))
-                            blur_kernel_size = self.settings.get('blur_kernel_size', 5)
-                            blur_kernel = (blur_kernel_size, blur_kernel_size) if blur_kernel_size > 0 else None
-
-                            edges = self.analyzer.preprocess_frame(frame, method, threshold_mode, manual_thresholds, blur_kernel)
-                            D, R2, log_scales, log_counts, reliable = self.analyzer.box_count(edges)
-
-                        elif analysis_type == 'dbc':
-                            # Differential Box Counting (uses grayscale)
-                            D, R2, log_scales, log_counts = self.analyzer.differential_box_count(gray)
-                            edges = gray # Show grayscale in preview instead of edges?
-                            
-                        elif analysis_type == 'fourier':
-                            # Fourier Slope
-                            D, R2, log_scales, log_counts = self.analyzer.fourier_slope(gray)
-                            edges = gray # Show grayscale
-                        
-                        result = {
-                            'frame_idx': frame_idx,
-                            'timestamp': frame_idx / fps if fps > 0 else 0,
-                            'D': D,
-                            'R2': R2,
-                            'reliable': reliable,
-                            'scales': log_scales,
-                            'counts': log_counts,
-                            'edge_pixels': cv2.countNonZero(edges) if (edges is not None and analysis_type == 'box_counting') else 0,
-                            'frame': frame,
-                            'edges': edges,
-                            'method': analysis_type
-                        }
-
-                        # Moisy-specific fields
-                        if analysis_type == 'moisy_boxcount':
-                            result['D_std'] = D_std
-                            result['threshold'] = moisy_thresh
-                            result['padded_size'] = padded_size
-                            result['scale_range'] = f"{scale_range[0]}-{scale_range[1]}"
-                            result['df'] = df  # local slopes for log-log highlight
-                        
-                        self.frame_processed.emit(result)
-                        
-                    except Exception as e:
-                        import traceback
-                        traceback.print_exc()
-                        print(f"Error processing frame {frame_idx}: {e}")
-                
-                self.progress_updated.emit(frame_idx - start_frame, clip_total)
-                frame_idx += 1
-                
-            cap.release()
+
+            # Deliver everything still pending before announcing the end
+            self._flush_results()
+            self._emit_progress()
+            if self._pending_preview is not None:
+                self._emit_preview()
+
             self.analysis_finished.emit()
-            
+
         except Exception as e:
             import traceback
             traceback.print_exc()
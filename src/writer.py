@@ -0,0 +1,190 @@
+"""Streaming on-disk output of per-frame results, written while the analysis runs.
+
+Besides the usual CSV, results go to a binary columnar directory::
+
+    schema.json               column names and kinds
+    <name>.bin                scalar column, raw little-endian values
+    <name>.values.bin         ragged column (log-log arrays): concatenated float64 values
+    <name>.offsets.bin        ... and int64 end offset of each row
+    <name>.txt                string column, one value per line
+
+Every file only ever grows by appending, so a crash leaves at most one
+partially written row, which :func:`read_result_columns` drops.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from src.stats import StreamingSummary
+from src.store import _column_dtype, canonical_columns
+
+
+def _column_kind(value):
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return 'ragged'
+    dtype = _column_dtype(value)
+    return 'string' if dtype == object else dtype.newbyteorder('<').str
+
+
+class StreamingResultWriter:
+    """Append batches of results to a CSV file and a columnar directory as they arrive.
+
+    Files are flushed after every batch and fsynced at most every
+    *fsync_interval* seconds; results queued with :meth:`append` are written
+    every *batch_rows* results or *fsync_interval* seconds, whichever comes
+    first.  Only the running ``StreamingSummary`` is kept
+    in memory, so :meth:`summary` finalizes the JSON summary without
+    re-reading the results.  The column set is fixed by the first result and
+    ordered by :func:`src.store.canonical_columns`; pass results without
+    preview images.
+    """
+
+    def __init__(self, csv_path=None, columns_dir=None, fsync_interval=5.0, batch_rows=256):
+        self.csv_path = csv_path
+        self.columns_dir = columns_dir
+        self.fsync_interval = fsync_interval
+        self.batch_rows = batch_rows
+        self._pending = []
+        self.aggregates = StreamingSummary()
+        self.rows = 0
+        self._schema = None
+        self._csv = None
+        self._files = {}
+        self._last_fsync = time.monotonic()
+        self._last_write = time.monotonic()
+
+    def _open(self, first):
+        self._schema = {name: _column_kind(first[name]) for name in canonical_columns(first)}
+        if self.csv_path:
+            self._csv = open(self.csv_path, 'w', newline='')
+        if self.columns_dir:
+            os.makedirs(self.columns_dir, exist_ok=True)
+            with open(os.path.join(self.columns_dir, 'schema.json'), 'w') as f:
+                json.dump({'columns': self._schema}, f, indent=4)
+            for name, kind in self._schema.items():
+                base = os.path.join(self.columns_dir, name)
+                if kind == 'ragged':
+                    self._files[name] = (open(base + '.values.bin', 'wb'),
+                                         open(base + '.offsets.bin', 'wb'))
+                elif kind == 'string':
+                    self._files[name] = (open(base + '.txt', 'w'),)
+                else:
+                    self._files[name] = (open(base + '.bin', 'wb'),)
+            self._offsets = {name: 0 for name, kind in self._schema.items() if kind == 'ragged'}
+
+    def write(self, results):
+        """Append a batch of result dictionaries."""
+        for result in results:
+            self.aggregates.add(result)
+        self._write_rows(self._pending + list(results))
+        self._pending = []
+
+    def append(self, result):
+        """Queue one result.
+
+        Queued results are written every *batch_rows* results or
+        *fsync_interval* seconds, whichever comes first.
+        """
+        self.aggregates.add(result)
+        self._pending.append(result)
+        # Slow methods: don't hold results in memory until batch_rows have queued
+        if (len(self._pending) >= self.batch_rows
+                or time.monotonic() - self._last_write >= self.fsync_interval):
+            self._write_rows(self._pending)
+            self._pending = []
+
+    def _write_rows(self, results):
+        self._last_write = time.monotonic()
+        if not results:
+            return
+        if self._schema is None:
+            self._open(results[0])
+
+        if self._csv is not None:
+            import pandas as pd
+            df = pd.DataFrame(results).reindex(columns=list(self._schema))
+            df.to_csv(self._csv, header=self.rows == 0, index=False)
+
+        for name, files in self._files.items():
+            kind = self._schema[name]
+            values = [r.get(name) for r in results]
+            if kind == 'ragged':
+                arrays = [np.asarray(v if v is not None else [], dtype='<f8').ravel() for v in values]
+                ends = self._offsets[name] + np.cumsum([len(a) for a in arrays])
+                if arrays:
+                    np.concatenate(arrays).tofile(files[0])
+                ends.astype('<i8').tofile(files[1])
+                self._offsets[name] = int(ends[-1])
+            elif kind == 'string':
+                files[0].write(''.join(f"{'' if v is None else v}\n" for v in values))
+            else:
+                np.asarray(values, dtype=kind).tofile(files[0])
+
+        self.rows += len(results)
+        self.flush()
+
+    def _all_files(self):
+        if self._csv is not None:
+            yield self._csv
+        for files in self._files.values():
+            yield from files
+
+    def flush(self, fsync=False):
+        for f in self._all_files():
+            f.flush()
+        if fsync or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            for f in self._all_files():
+                os.fsync(f.fileno())
+            self._last_fsync = time.monotonic()
+
+    def close(self):
+        self._write_rows(self._pending)
+        self._pending = []
+        self.flush(fsync=True)
+        for f in self._all_files():
+            f.close()
+        self._csv = None
+        self._files = {}
+
+    def summary(self, video_path):
+        """JSON summary of everything written (or queued) so far (see ``StreamingSummary``)."""
+        return self.aggregates.summary(video_path)
+
+
+def _read_column(path, dtype):
+    # Whole items only: the file may end in a partially written value
+    dtype = np.dtype(dtype)
+    return np.fromfile(path, dtype=dtype, count=os.path.getsize(path) // dtype.itemsize)
+
+
+def read_result_columns(columns_dir):
+    """Load a columnar result directory into a dict of arrays.
+
+    Scalar columns come back as NumPy arrays, string columns as object
+    arrays and ragged columns as lists of float64 arrays (views into one
+    buffer).  A trailing row left incomplete by a crash is dropped.
+    """
+    with open(os.path.join(columns_dir, 'schema.json')) as f:
+        schema = json.load(f)['columns']
+
+    columns = {}
+    for name, kind in schema.items():
+        base = os.path.join(columns_dir, name)
+        if kind == 'ragged':
+            values = _read_column(base + '.values.bin', '<f8')
+            ends = _read_column(base + '.offsets.bin', '<i8')
+            ends = ends[ends <= len(values)]
+            columns[name] = np.split(values[:ends[-1]], ends[:-1]) if len(ends) else []
+        elif kind == 'string':
+            with open(base + '.txt') as f:
+                lines = f.read().split('\n')
+            columns[name] = np.array(lines[:-1], dtype=object)  # last entry: after final newline
+        else:
+            columns[name] = _read_column(base + '.bin', kind)
+
+    rows = min((len(col) for col in columns.values()), default=0)
+    return {name: col[:rows] for name, col in columns.items()}
@@ -0,0 +1,111 @@
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from src import pipeline
+from src.cache import FrameCache
+from src.pipeline import analyze_video
+
+SETTINGS = {'analysis_type': 'box_counting', 'sampling_rate': 3}
+
+
+def test_frame_cache_hits_match_uncached(clip, analyze, assert_same_results, tmp_path):
+    settings = dict(SETTINGS, frame_cache=True, cache_dir=str(tmp_path))
+    expected = analyze(clip, SETTINGS)
+    assert_same_results(analyze(clip, settings), expected)  # fills the cache
+    assert_same_results(analyze(clip, settings), expected)  # served from it
+
+    # Every sampled frame is cached and read back without opening the video
+    cache = FrameCache(clip, str(tmp_path))
+    assert cache.valid[::3].all()
+    cap = cache.capture()
+    for idx in range(0, cache.total_frames, 3):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        assert ret and frame.shape == (cache.height, cache.width)
+    assert cap._cap is None
+    cap.release()
+
+
+def test_frame_cache_evicts_least_recently_used(clip, tmp_path):
+    other = str(tmp_path / 'other.avi')
+    shutil.copy(clip, other)
+    cache_dir = str(tmp_path / 'cache')
+    frames_dir = os.path.join(cache_dir, 'frames')
+
+    def fill(video_path):
+        cache = FrameCache(video_path, cache_dir, max_mb=2.5)
+        cap = cache.capture()
+        while cap.read()[0]:
+            pass
+        cap.release()
+        return cache
+
+    first = fill(clip)
+    assert first.valid.all()
+    assert any(name.startswith(first.key) for name in os.listdir(frames_dir))
+
+    # 90 frames of 160x120 take about 1.7 MB: the second video evicts the first
+    second = fill(other)
+    assert second.valid.all()
+    names = os.listdir(frames_dir)
+    assert not any(name.startswith(first.key) for name in names)
+    assert any(name.startswith(second.key) for name in names)
+    assert sum(os.path.getsize(os.path.join(frames_dir, n)) for n in names) <= 2.5 * 1024 * 1024
+
+    # Frames beyond the budget are still served, just not cached
+    cache = FrameCache(clip, cache_dir, max_mb=0.5)
+    cap = cache.capture()
+    frames = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        assert isinstance(frame, np.ndarray)
+        frames += 1
+    cap.release()
+    assert frames == cache.total_frames
+    assert not cache.valid.all()
+
+
+def _run_tracked(video_path, settings, stop_after=None):
+    """analyze_video results, and the frame indices freshly analyzed (those with previews)."""
+    results, fresh = [], []
+
+    def collect(result):
+        if result.pop('frame', None) is not None:
+            fresh.append(result['frame_idx'])
+        result.pop('edges', None)
+        result.pop('df', None)
+        results.append(result)
+
+    def is_running():
+        return stop_after is None or len(results) < stop_after
+
+    assert analyze_video(video_path, settings, on_result=collect, is_running=is_running)
+    return results, fresh
+
+
+def test_result_cache_resumes(clip, analyze, assert_same_results, tmp_path, monkeypatch):
+    # Seek over every cached gap, however short, so this clip resumes in several runs
+    monkeypatch.setattr(pipeline, '_RESUME_SEEK_GAP', 1)
+    expected = analyze(clip, SETTINGS)
+    settings = dict(SETTINGS, result_cache=True, cache_dir=str(tmp_path))
+
+    # Interrupted run, then a run over the middle of the clip only
+    partial, fresh = _run_tracked(clip, settings, stop_after=10)
+    assert len(fresh) == 10
+    middle, _ = _run_tracked(clip, dict(settings, clip_start_sec=1.5, clip_end_sec=2.0))
+    done = {r['frame_idx'] for r in partial + middle}
+
+    # Resuming analyzes only the missing frames and delivers everything in order
+    results, fresh = _run_tracked(clip, settings)
+    assert_same_results(results, expected)
+    assert set(fresh) == {r['frame_idx'] for r in expected} - done
+
+    # A finished job is served entirely from the cache
+    results, fresh = _run_tracked(clip, settings)
+    assert_same_results(results, expected)
+    assert fresh == []
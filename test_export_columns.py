@@ -0,0 +1,58 @@
+import csv
+import os
+
+import numpy as np
+
+from src.store import ResultStore
+from src.utils import save_results_to_csv
+from src.writer import StreamingResultWriter
+
+EXPECTED_HEADER = ['frame_idx', 'timestamp', 'D', 'R2', 'reliable', 'scales', 'counts',
+                   'edge_pixels', 'method']
+
+
+def _results(n=3):
+    # Keys deliberately in alphabetical order, as a QVariant round trip returns them
+    results = []
+    for i in range(n):
+        result = {
+            'frame_idx': i * 30,
+            'timestamp': i * 1.0,
+            'D': 1.4 + 0.01 * i,
+            'R2': 0.99,
+            'reliable': True,
+            'scales': np.log([2.0, 4.0, 8.0]),
+            'counts': np.log([100.0, 30.0, 9.0]),
+            'edge_pixels': 1000 + i,
+            'method': 'box_counting',
+        }
+        results.append(dict(sorted(result.items())))
+    return results
+
+
+def _header(path):
+    with open(path, newline='') as f:
+        return next(csv.reader(f))
+
+
+def test_store_export_header(tmp_path):
+    store = ResultStore.from_results(_results())
+    path = os.path.join(tmp_path, 'results.csv')
+    save_results_to_csv(store, path)
+    assert _header(path) == EXPECTED_HEADER
+
+
+def test_streaming_writer_header(tmp_path):
+    path = os.path.join(tmp_path, 'results.csv')
+    writer = StreamingResultWriter(path)
+    writer.write(_results())
+    writer.close()
+    assert _header(path) == EXPECTED_HEADER
+
+
+def test_multi_method_columns_follow_method_order(tmp_path):
+    result = {'frame_idx': 0, 'timestamp': 0.0, 'D': 1.5, 'methods': 'moisy_boxcount+dbc',
+              'dbc_D': 2.4, 'moisy_boxcount_D_std': 0.1, 'moisy_boxcount_D': 1.5}
+    store = ResultStore.from_results([result])
+    assert store.columns == ['frame_idx', 'timestamp', 'D', 'methods',
+                             'moisy_boxcount_D', 'moisy_boxcount_D_std', 'dbc_D']
@@ -0,0 +1,22 @@
+import pytest
+
+SETTINGS = {'analysis_type': 'box_counting', 'sampling_rate': 3}
+
+
+@pytest.mark.parametrize('analysis_type', ['box_counting', 'moisy_boxcount'])
+def test_frame_parallel_matches_serial(clip, analyze, assert_same_results, analysis_type):
+    settings = dict(SETTINGS, analysis_type=analysis_type)
+    serial = analyze(clip, settings)
+    parallel = analyze(clip, dict(settings, frame_workers=2))
+    assert len(serial) == 30
+    assert_same_results(parallel, serial)
+
+
+@pytest.mark.parametrize('sampling_rate', [1, 4])
+def test_segments_match_serial(clip, analyze, assert_same_results, sampling_rate):
+    # A clip range that does not start on a segment boundary or a sample
+    settings = dict(SETTINGS, sampling_rate=sampling_rate, clip_start_sec=0.1, clip_end_sec=2.9)
+    serial = analyze(clip, settings)
+    segmented = analyze(clip, dict(settings, segments=3))
+    assert serial
+    assert_same_results(segmented, serial)
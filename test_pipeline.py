@@ -0,0 +1,8 @@
+def test_batched_label_follows_analysis_types(clip, analyze, assert_same_results):
+    # analysis_types drives the run; a stale analysis_type must not leak into the label
+    settings = {'analysis_types': ['box_counting'], 'analysis_type': 'moisy_boxcount',
+                'sampling_rate': 3}
+    serial = analyze(clip, settings)
+    batched = analyze(clip, dict(settings, batch_size=8))
+    assert {r['method'] for r in batched} == {'box_counting'}
+    assert_same_results(batched, serial)
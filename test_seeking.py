@@ -0,0 +1,58 @@
+import pytest
+
+from src.seeking import FrameSkipper
+
+SETTINGS = {'analysis_type': 'box_counting', 'sampling_rate': 7, 'clip_start_sec': 0.2}
+
+
+@pytest.mark.parametrize('skip_mode', ['seek', 'auto'])
+def test_skip_modes_match_grab(clip, analyze, assert_same_results, skip_mode):
+    expected = analyze(clip, dict(SETTINGS, skip_mode='grab'))
+    assert [r['frame_idx'] for r in expected] == list(range(6, 90, 7))
+    assert_same_results(analyze(clip, dict(SETTINGS, skip_mode=skip_mode)), expected)
+
+
+def test_skip_modes_match_through_segments_and_cache(clip, analyze, assert_same_results, tmp_path):
+    expected = analyze(clip, dict(SETTINGS, skip_mode='grab'))
+    settings = dict(SETTINGS, skip_mode='seek', frame_cache=True, cache_dir=str(tmp_path))
+    assert_same_results(analyze(clip, dict(settings, segments=2)), expected)
+    assert_same_results(analyze(clip, dict(settings, frame_workers=2)), expected)
+
+
+class _FakeCapture:
+    """Capture whose grab() costs *grab_cost* ticks of a fake clock and seeking *seek_cost*."""
+
+    def __init__(self, clock, grab_cost, seek_cost, total=1000):
+        self.clock, self.grab_cost, self.seek_cost = clock, grab_cost, seek_cost
+        self.pos, self.total, self.grabs, self.seeks = 0, total, 0, 0
+
+    def grab(self):
+        if self.pos >= self.total:
+            return False
+        self.clock[0] += self.grab_cost
+        self.pos += 1
+        self.grabs += 1
+        return True
+
+    def set(self, prop, value):
+        self.clock[0] += self.seek_cost
+        self.pos = int(value)
+        self.seeks += 1
+        return True
+
+
+@pytest.mark.parametrize('seek_cost, prefer_seek', [(1.0, True), (100.0, False)])
+def test_auto_mode_picks_cheaper_strategy(monkeypatch, seek_cost, prefer_seek):
+    clock = [0.0]
+    monkeypatch.setattr('src.seeking.time.perf_counter', lambda: clock[0])
+    cap = _FakeCapture(clock, grab_cost=1.0, seek_cost=seek_cost)
+    skipper = FrameSkipper(cap, 'auto')
+    for target in range(30, 900, 30):
+        assert skipper.skip(cap.pos, target)
+        assert cap.pos == target
+        cap.pos += 1  # the sampled frame itself is read
+    # After one measurement of each, the cheaper strategy dominates
+    if prefer_seek:
+        assert cap.seeks > 20
+    else:
+        assert cap.seeks <= 2
@@ -0,0 +1,37 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stats import StreamingStats, StreamingSummary
+from src.utils import summarize_results
+
+
+def test_non_finite_values_are_counted_not_added():
+    values = [1.4, float('nan'), 1.2, float('inf'), 1.6]
+    one_by_one = StreamingStats()
+    for value in values:
+        one_by_one.add(value)
+    at_once = StreamingStats.from_values(values)
+    for stats in (one_by_one, at_once):
+        assert stats.count == 3
+        assert stats.non_finite == 2
+        assert stats.mean == pytest.approx(1.4)
+        assert stats.max == 1.6
+        assert math.isfinite(stats.median)
+
+
+def test_streaming_summary_matches_pandas_with_failed_frames():
+    D = np.array([1.35, 1.42, np.nan, 1.55, 1.31, np.nan, 1.48])
+    results = [{'frame_idx': i, 'timestamp': i / 30, 'D': d} for i, d in enumerate(D)]
+    streaming = StreamingSummary()
+    for result in results:
+        streaming.add(result)
+    summary = streaming.summary('clip.mp4')
+    expected = summarize_results(pd.DataFrame(results), 'clip.mp4')
+    assert summary['total_frames'] == expected['total_frames'] == 7
+    assert summary['non_finite_D'] == expected['non_finite_D'] == 2
+    for key in ('mean_D', 'std_D', 'min_D', 'max_D', 'percent_optimal'):
+        assert summary[key] == pytest.approx(expected[key])
+    assert summary['median_D'] == pytest.approx(expected['median_D'], abs=0.001)  # sketch bin
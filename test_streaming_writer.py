@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+
+from src.writer import read_result_columns
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_killed_writer_keeps_appended_results(tmp_path):
+    # A slow analysis: a few results, far fewer than batch_rows, then the process dies
+    columns_dir = os.path.join(tmp_path, 'results.columns')
+    script = textwrap.dedent(f"""
+        import os, time
+        import numpy as np
+        from src.writer import StreamingResultWriter
+        writer = StreamingResultWriter({os.path.join(tmp_path, 'results.csv')!r}, {columns_dir!r},
+                                       fsync_interval=0.05)
+        for i in range(5):
+            writer.append({{'frame_idx': i, 'timestamp': i / 30, 'D': 1.5, 'reliable': True,
+                            'scales': np.arange(3.0), 'counts': np.arange(3.0) + i,
+                            'method': 'box_counting'}})
+            time.sleep(0.1)
+        os._exit(1)
+    """)
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=False)
+
+    columns = read_result_columns(columns_dir)
+    assert len(columns['frame_idx']) >= 4
+    n = len(columns['frame_idx'])
+    np.testing.assert_array_equal(columns['frame_idx'], np.arange(n))
+    np.testing.assert_array_equal(columns['counts'][-1], np.arange(3.0) + n - 1)
+    assert list(columns['method']) == ['box_counting'] * n
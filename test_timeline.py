@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.timeline import minmax_decimate
+
+
+def test_decimate_keeps_extremes():
+    x = np.arange(10_000) / 30.0
+    y = np.sin(x)
+    y[5000] = 3.0
+    xs, ys = minmax_decimate(x, y, 0, x[-1], 100)
+    assert len(xs) <= 2 * 100 + 2
+    assert ys.max() == 3.0
+    assert np.all(np.diff(xs) > 0)
+
+
+def test_decimate_skips_non_finite_values():
+    x = np.arange(10_000) / 30.0
+    y = np.full(len(x), 1.4)
+    y[::7] = np.nan
+    y[-1] = np.nan  # last value of the window
+    y[100] = np.inf
+    xs, ys = minmax_decimate(x, y, 0, x[-1], 100)
+    assert np.isfinite(ys).all()
+    assert len(xs) > 0
+
+    xs, ys = minmax_decimate(x, np.full(len(x), np.nan), 0, x[-1], 100)
+    assert len(xs) == 0
@@ -43,5 +43,30 @@ def main():
     D_edge, R2_edge, _, _, reliable_edge = analyzer.box_count(edges_sierp)
     print(f"     Result: D={D_edge:.4f}, R²={R2_edge:.4f}, Reliable={reliable_edge}")
 
+    # Test 3: Koch curve and Cantor-type sets (box counting regression check)
+    # Not a ground-truth check: the ideal sets have D = log4/log3 (Koch, dust)
+    # and log8/log3 (carpet), but box_count's dyadic boxes do not align with
+    # their triadic construction and measure them up to 0.1 off.  The expected
+    # values are box_count's own output at the default sizes, so this only
+    # catches changes in box_count.
+    print("\nTest 3: Koch Curve / Cantor Sets (Box Count, regression check only)")
+    tolerance = 0.01
+    cases = (('Koch curve', analyzer.generate_koch_curve(), 1.168, np.log(4) / np.log(3)),
+             ('Cantor dust', analyzer.generate_cantor_set(pattern='dust'), 1.288, np.log(4) / np.log(3)),
+             ('Cantor carpet', analyzer.generate_cantor_set(pattern='carpet'), 1.879, np.log(8) / np.log(3)))
+    for name, image, previous, ideal in cases:
+        D, R2, _, _, _ = analyzer.box_count(image)
+        status = "unchanged" if abs(D - previous) <= tolerance else "CHANGED"
+        print(f"  {name}: D={D:.4f}, R²={R2:.4f} (previously {previous:.3f} ± {tolerance}: {status}; "
+              f"ideal set {ideal:.4f}, not expected from dyadic boxes)")
+
+    # Test 4: fractional Brownian surfaces (Fourier slope, D = 3 - H)
+    print("\nTest 4: fBm Surfaces (Fourier Slope, D = 3 - H)")
+    for hurst in (0.2, 0.5, 0.8):
+        surface = analyzer.generate_fbm_surface(hurst=hurst)
+        D, R2, _, _ = analyzer.fourier_slope(surface)
+        D_dbc, _, _, _ = analyzer.differential_box_count(surface)
+        print(f"  H={hurst}: Fourier D={D:.4f} (theory {3 - hurst:.1f}), R²={R2:.4f}; DBC D={D_dbc:.4f}")
+
 if __name__ == "__main__":
     main()